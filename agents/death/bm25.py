@@ -0,0 +1,112 @@
+import re
+import json
+import math
+from collections import Counter, defaultdict
+
+# --------------------------
+# In-memory BM25 keyword index
+# --------------------------
+# Built from the same chunks as the FAISS index (see embeddings.build_index)
+# and saved next to it as bm25.json. Exact terms such as article numbers
+# ("Art. 85") and field names ("date_of_death") score directly, and a query
+# is answered without computing an embedding.
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how in is it of on or the to was were what when "
+    "where which who why with".split()
+)
+
+_ARTICLE = re.compile(r"\bart(?:icle)?\.?\s*(\d+)", re.IGNORECASE)
+_KEYWORD_QUERY = re.compile(r'\d|\w_\w|"\w')
+
+def tokenize(text: str) -> list:
+    """
+    Lowercased word tokens. snake_case identifiers also contribute their
+    parts. An article reference ("Art. 85") becomes the single token "art85"
+    instead of "art" and "85", so the article number only matches next to
+    its "Art." prefix and "Art. 12" does not match other articles.
+    """
+    text = text.lower()
+    tokens = []
+    covered = []  # spans of article references, whose words only count as "artNN"
+    for match in _ARTICLE.finditer(text):
+        tokens.append(f"art{match.group(1)}")
+        covered.append(match.span())
+    for match in _TOKEN.finditer(text):
+        word = match.group()
+        if word in STOPWORDS or any(start <= match.start() < end for start, end in covered):
+            continue
+        tokens.append(word)
+        if "_" in word:
+            tokens.extend(part for part in word.split("_") if part and part not in STOPWORDS)
+    return tokens
+
+def is_keyword_query(query: str) -> bool:
+    """Queries naming a number, an article, a field name or a quoted term."""
+    return bool(_KEYWORD_QUERY.search(query))
+
+
+class BM25Index:
+    def __init__(self, documents, k1: float = 1.5, b: float = 0.75):
+        """`documents` is a list of (chunk id, service, text)."""
+        self.documents = [tuple(doc) for doc in documents]
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(list)  # term -> [(doc index, term frequency)]
+        self.lengths = []
+        for i, (_, _, text) in enumerate(self.documents):
+            counts = Counter(tokenize(text))
+            self.lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings[term].append((i, tf))
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+        n = len(self.documents)
+        self.idf = {
+            term: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def __len__(self):
+        return len(self.documents)
+
+    def scores(self, query: str, service: str = None) -> list:
+        """[(score, doc index)] for documents matching any query term, best first."""
+        totals = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for i, tf in self.postings[term]:
+                if service is not None and self.documents[i][1] != service:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[i] / self.average_length)
+                totals[i] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(((score, i) for i, score in totals.items()), key=lambda item: (-item[0], item[1]))
+
+    def search(self, query: str, k: int = 3, service: str = None) -> list:
+        return [self.documents[i][2] for _, i in self.scores(query, service)[:k]]
+
+    # --------------------------
+    # Persistence
+    # --------------------------
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"k1": self.k1, "b": self.b, "documents": self.documents}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path) -> "BM25Index":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["documents"], k1=data["k1"], b=data["b"])
+
+
+def reciprocal_rank_fusion(rankings, k: int = 60) -> list:
+    """Merge ranked lists of texts; each list contributes 1 / (k + rank) per item."""
+    scores = defaultdict(float)
+    first_seen = {}
+    for ranking in rankings:
+        for rank, text in enumerate(ranking, start=1):
+            scores[text] += 1 / (k + rank)
+            first_seen.setdefault(text, len(first_seen))
+    return sorted(scores, key=lambda text: (-scores[text], first_seen[text]))
@@ -0,0 +1,167 @@
+import os
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+from db.database import get_connection
+from .config import CERTIFICATES_PATH, CERTIFICATE_PREFIX, CERTIFICATE_WORKERS
+
+# --------------------------
+# Certificate rendering
+# --------------------------
+# The layout (title, labels, value positions) is fixed at import time. A
+# multi-page archive draws the static part once as a form XObject shared by
+# every page, which then only places the form with doForm and stamps the
+# record's values. A single-certificate PDF would have to embed its own copy
+# of the form, which costs more than it saves, so it draws labels and values
+# in one text object with one font change instead of a drawString per line.
+# Streams are left uncompressed: each page is a few hundred bytes.
+
+TEMPLATE_NAME = "death_certificate"
+TITLE = ("Helvetica-Bold", 16, 100, 800, "Death Certificate")
+FIELDS = [
+    # (label, record key, y)
+    ("Certificate Number", "certificate_number", 770),
+    ("Full Name", "full_name", 750),
+    ("National ID", "national_id", 730),
+    ("Date of Death", "date_of_death", 710),
+    ("Place of Death", "place_of_death", 690),
+    ("Cause of Death", "cause_of_death", 670),
+    ("Informant", "informant_name", 650),
+    ("Date Registered", "date_registered", 630),
+]
+FONT, FONT_SIZE, LEFT = "Helvetica", 12, 100
+
+# Values start right after "<label>: ", measured once
+VALUE_X = [LEFT + stringWidth(f"{label}: ", FONT, FONT_SIZE) for label, _, _ in FIELDS]
+
+def certificate_number_for(record_id) -> str:
+    return f"{CERTIFICATE_PREFIX}-{record_id:04d}"
+
+def _values(death_record, certificate_number, date_registered):
+    values = dict(death_record, certificate_number=certificate_number, date_registered=date_registered)
+    return [str(values.get(key, "")) for _, key, _ in FIELDS]
+
+def _draw_title(c):
+    font, size, x, y, text = TITLE
+    c.setFont(font, size)
+    c.drawString(x, y, text)
+
+def _define_template(c):
+    c.beginForm(TEMPLATE_NAME)
+    _draw_title(c)
+    labels = c.beginText()
+    labels.setFont(FONT, FONT_SIZE)
+    for label, _, y in FIELDS:
+        labels.setTextOrigin(LEFT, y)
+        labels.textOut(f"{label}: ")
+    c.drawText(labels)
+    c.endForm()
+
+def _stamp(c, values):
+    """Archive page: place the shared template, then only the values."""
+    c.doForm(TEMPLATE_NAME)
+    text = c.beginText()
+    text.setFont(FONT, FONT_SIZE)
+    for (_, _, y), x, value in zip(FIELDS, VALUE_X, values):
+        text.setTextOrigin(x, y)
+        text.textOut(value)
+    c.drawText(text)
+    c.showPage()
+
+def render_certificate(death_record, output_dir=CERTIFICATES_PATH, date_registered=None):
+    """Render one certificate PDF; returns (file_path, certificate_number)."""
+    certificate_number = certificate_number_for(death_record['record_id'])
+    file_path = os.path.join(output_dir, f"{certificate_number}.pdf")
+    os.makedirs(output_dir, exist_ok=True)
+    values = _values(death_record, certificate_number, date_registered or datetime.now().strftime('%Y-%m-%d'))
+
+    c = canvas.Canvas(file_path, pagesize=A4, pageCompression=0)
+    _draw_title(c)
+    text = c.beginText()
+    text.setFont(FONT, FONT_SIZE)
+    for (label, _, y), value in zip(FIELDS, values):
+        text.setTextOrigin(LEFT, y)
+        text.textOut(f"{label}: {value}")
+    c.drawText(text)
+    c.showPage()
+    c.save()
+    return file_path, certificate_number
+
+def render_archive(death_records, file_path, date_registered=None) -> list:
+    """Render every record as a page of one PDF; returns the certificate numbers."""
+    os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+    date_registered = date_registered or datetime.now().strftime('%Y-%m-%d')
+    c = canvas.Canvas(file_path, pagesize=A4, pageCompression=0)
+    _define_template(c)
+    numbers = []
+    for death_record in death_records:
+        certificate_number = certificate_number_for(death_record['record_id'])
+        _stamp(c, _values(death_record, certificate_number, date_registered))
+        numbers.append(certificate_number)
+    c.save()
+    return numbers
+
+def _render_chunk(args):
+    death_records, output_dir, date_registered = args
+    return [render_certificate(record, output_dir, date_registered) for record in death_records]
+
+def render_bulk(death_records, output_dir=CERTIFICATES_PATH, workers=CERTIFICATE_WORKERS,
+                archive_path=None, chunk_size=100) -> list:
+    """
+    Render many certificates.
+
+    Without `archive_path`, one PDF per record is rendered across a pool of
+    `workers` processes and [(file_path, certificate_number)] is returned.
+    With `archive_path`, all records become pages of that single PDF
+    (a PDF is written by one process, and sharing the template across pages
+    already makes this the cheaper mode); [(archive_path, number)] is returned.
+    """
+    death_records = list(death_records)
+    date_registered = datetime.now().strftime('%Y-%m-%d')
+    if archive_path:
+        numbers = render_archive(death_records, archive_path, date_registered)
+        return [(archive_path, number) for number in numbers]
+
+    chunks = [(death_records[i:i + chunk_size], output_dir, date_registered)
+              for i in range(0, len(death_records), chunk_size)]
+    if workers <= 1 or len(chunks) <= 1:
+        return [result for chunk in chunks for result in _render_chunk(chunk)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [result for rendered in pool.map(_render_chunk, chunks) for result in rendered]
+
+def load_death_records(record_ids=None):
+    """Death records joined with citizen and informant names, for reissuing certificates."""
+    query = """
+        SELECT d.record_id, c.full_name, c.national_id, d.date_of_death, d.place_of_death,
+               d.cause_of_death, i.full_name
+        FROM death_records d
+        LEFT JOIN citizens c ON c.citizen_id = d.citizen_id
+        LEFT JOIN informants i ON i.informant_id = d.informant_id
+    """
+    params = ()
+    if record_ids:
+        query += f" WHERE d.record_id IN ({', '.join('?' for _ in record_ids)})"
+        params = tuple(record_ids)
+    keys = ("record_id", "full_name", "national_id", "date_of_death", "place_of_death",
+            "cause_of_death", "informant_name")
+    for row in get_connection().execute(query + " ORDER BY d.record_id", params):
+        yield dict(zip(keys, row))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reissue death certificates in bulk.")
+    parser.add_argument("record_ids", nargs="*", type=int, help="records to render (default: all)")
+    parser.add_argument("--output-dir", default=CERTIFICATES_PATH)
+    parser.add_argument("--archive", help="write every certificate as a page of this PDF instead")
+    parser.add_argument("--workers", type=int, default=CERTIFICATE_WORKERS)
+    args = parser.parse_args()
+
+    start = datetime.now()
+    rendered = render_bulk(load_death_records(args.record_ids), output_dir=args.output_dir,
+                           workers=args.workers, archive_path=args.archive)
+    elapsed = (datetime.now() - start).total_seconds()
+    target = args.archive or args.output_dir
+    print(f"Rendered {len(rendered):,} certificates to {target} in {elapsed:.1f}s")
@@ -3,6 +3,79 @@ import os
 BASE_DIR = os.path.dirname(__file__)
 DOCUMENTS_PATH = os.path.join(BASE_DIR, "../../data/documents")
 CERTIFICATES_PATH = os.path.join(BASE_DIR, "../../data/certificates")
+CACHE_PATH = os.path.join(BASE_DIR, "../../data/cache")
+KNOWLEDGE_BASE_PATH = os.path.join(BASE_DIR, "../../knowledge_base")
+LOGS_PATH = os.path.join(BASE_DIR, "../../logs")
 
 OCR_LANG = 'amh'  # Amharic language for Tesseract
+OCR_DPI = int(os.getenv("OCR_DPI", "200"))  # pdf2image's default rendering resolution
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(min(4, os.cpu_count() or 1))))  # PDF pages OCR'd in parallel
+OCR_CACHE_DB = os.getenv("OCR_CACHE_DB", os.path.join(CACHE_PATH, "ocr_results.sqlite"))  # "" disables
+OCR_CACHE_MAX_BYTES = int(os.getenv("OCR_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
 CERTIFICATE_PREFIX = "DC"  # Death Certificate
+CERTIFICATE_WORKERS = int(os.getenv("CERTIFICATE_WORKERS", str(os.cpu_count() or 1)))  # bulk reissue processes
+
+# Rules indexed into the shared knowledge-base vector store, by service
+KNOWLEDGE_BASE_FILES = {
+    "death": os.path.join(KNOWLEDGE_BASE_PATH, "death_rules.json"),
+    "birth": os.path.join(KNOWLEDGE_BASE_PATH, "birth_rules.json"),
+    "marriage": os.path.join(KNOWLEDGE_BASE_PATH, "marriage_rules.json"),
+    "divorce": os.path.join(KNOWLEDGE_BASE_PATH, "divorce_rules.json"),
+}
+# Embedding backend for the knowledge base: "google" (remote Gemini embeddings)
+# or "hashing" (local hashed n-grams, no network). Each backend has its own index.
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "google")
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "1024"))  # hashing backend only
+# Built artifact, not committed (see .gitignore). Build it as a deploy step,
+# after every rules change, with `python -m agents.death.embeddings`;
+# otherwise the first query embeds the whole knowledge base.
+KB_INDEX_PATH = os.path.join(
+    KNOWLEDGE_BASE_PATH,
+    "rules_embeddings.index" if EMBEDDING_BACKEND == "google" else f"rules_embeddings.{EMBEDDING_BACKEND}.index",
+)
+
+# Registrations later than this many days after death are escalated for review
+LATE_REGISTRATION_DAYS = int(os.getenv("LATE_REGISTRATION_DAYS", "30"))
+
+# Verify all uploaded documents with one LLM request instead of one per file
+LLM_BATCH_VERIFICATION = os.getenv("LLM_BATCH_VERIFICATION", "1") == "1"
+
+# Maximum number of documents OCR'd / verified at once by the async workflow
+WORKFLOW_CONCURRENCY = int(os.getenv("WORKFLOW_CONCURRENCY", "4"))
+
+# Knowledge-base query cache (set KB_CACHE_DB to "" to disable the disk tier)
+KB_CACHE_SIZE = int(os.getenv("KB_CACHE_SIZE", "256"))
+KB_CACHE_TTL = float(os.getenv("KB_CACHE_TTL", "86400"))  # seconds
+KB_CACHE_DB = os.getenv("KB_CACHE_DB", os.path.join(CACHE_PATH, "kb_queries.sqlite"))
+
+# Knowledge-base retrieval: "vector" (FAISS), "bm25" (local keyword index),
+# "hybrid" (rank fusion of both) or "auto" (bm25 for keyword queries, else hybrid)
+KB_RETRIEVAL_MODE = os.getenv("KB_RETRIEVAL_MODE", "auto")
+KB_HYBRID_CANDIDATES = int(os.getenv("KB_HYBRID_CANDIDATES", "20"))  # per retriever, before fusion
+
+# LLM client: connect/read timeouts in seconds and retries for 429/5xx/timeouts
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+
+# LLM response cache: read_through, write_through or disabled. This is the
+# default for call sites that don't pass groq_llm_reason(cache=...); the
+# per-applicant fraud decision always passes disabled. Set LLM_CACHE_DB to
+# "" to disable the cache entirely
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "read_through")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 86400)))  # seconds
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB", os.path.join(CACHE_PATH, "llm_responses.sqlite"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# Background workers running queued registrations (python -m agents.death.worker)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "0.5"))  # seconds between empty-queue polls
+
+# Upload store limits (see agents/death/uploads.py)
+UPLOAD_MAX_FILE_BYTES = int(os.getenv("UPLOAD_MAX_FILE_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_MAX_APPLICATION_BYTES = int(os.getenv("UPLOAD_MAX_APPLICATION_BYTES", str(25 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Span export for agents/death/tracing.py ("" keeps spans in memory only)
+TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH", os.path.join(LOGS_PATH, "traces.jsonl"))
+TRACE_MAX_VALUE_CHARS = int(os.getenv("TRACE_MAX_VALUE_CHARS", "200"))  # per state value in logs
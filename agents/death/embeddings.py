@@ -1,21 +1,20 @@
 import json
 import os
 import asyncio
-import nest_asyncio
+import hashlib
+import logging
+import threading
 from pathlib import Path
 from dotenv import load_dotenv
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from .cache import TTLCache, DiskCache
+from .tracing import span
+from .bm25 import BM25Index, is_keyword_query, reciprocal_rank_fusion
+from .config import (
+    KB_CACHE_SIZE, KB_CACHE_TTL, KB_CACHE_DB, KB_INDEX_PATH, KNOWLEDGE_BASE_FILES,
+    EMBEDDING_BACKEND, EMBEDDING_DIMENSIONS, KB_RETRIEVAL_MODE, KB_HYBRID_CANDIDATES,
+)
 
-# --------------------------
-# Fix async event loop issues (Streamlit + gRPC)
-# --------------------------
-nest_asyncio.apply()
-try:
-    asyncio.get_event_loop()
-except RuntimeError:
-    asyncio.set_event_loop(asyncio.new_event_loop())
+logger = logging.getLogger(__name__)
 
 # --------------------------
 # Load environment variables
@@ -23,14 +22,42 @@ except RuntimeError:
 load_dotenv()
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
-JSON_PATH = "knowledge_base/death_rules.json"
-INDEX_PATH = Path(__file__).parent / "death_embeddings.index"
+# One shared index covers every service; each vector carries a
+# {"service": ...} metadata entry used to filter queries.
+INDEX_PATH = Path(KB_INDEX_PATH)
+
+# Heavy dependencies (LangChain, FAISS, gRPC) are imported inside the
+# functions below so that importing this module stays cheap; nothing is
+# read, split or embedded until the first query or an explicit build.
+
+# --------------------------
+# Fix async event loop issues (Streamlit + gRPC)
+# --------------------------
+_event_loop_ready = False
+
+def _ensure_event_loop():
+    global _event_loop_ready
+    if _event_loop_ready:
+        return
+    import nest_asyncio
+    nest_asyncio.apply()
+    try:
+        asyncio.get_event_loop()
+    except RuntimeError:
+        asyncio.set_event_loop(asyncio.new_event_loop())
+    _event_loop_ready = True
 
 # --------------------------
 # Load JSON and flatten
 # --------------------------
-with open(JSON_PATH, "r", encoding="utf-8") as f:
-    death_data = json.load(f)
+def load_rules(path) -> dict:
+    """Load a rules file; missing or empty files yield an empty rule set."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            raw = f.read()
+    except FileNotFoundError:
+        return {}
+    return json.loads(raw) if raw.strip() else {}
 
 def flatten_json(d, prefix=""):
     """Recursively flatten JSON into text strings."""
@@ -45,44 +72,408 @@ def flatten_json(d, prefix=""):
             texts.append(f"{prefix}{k}: {v}")
     return texts
 
-chunks = flatten_json(death_data)
-
 # --------------------------
 # Split into chunks
 # --------------------------
-splitter = RecursiveCharacterTextSplitter(
-    chunk_size=500,
-    chunk_overlap=50
-)
-texts = splitter.split_text("\n".join(chunks))
+def _section_of(line: str) -> str:
+    """Top two key levels of a flattened line, e.g. 'death_registration.required_documents'."""
+    path = line.split(":", 1)[0]
+    return ".".join(path.split(".")[:2])
+
+def build_chunks(path) -> list:
+    """
+    Flatten the rules file and split it into embedding-sized chunks.
+
+    Each top-level section is split on its own so that editing one rule
+    only changes the chunks of its section, which keeps incremental
+    re-indexing cheap.
+    """
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=500,
+        chunk_overlap=50
+    )
+    sections = {}
+    for line in flatten_json(load_rules(path)):
+        sections.setdefault(_section_of(line), []).append(line)
+
+    texts = []
+    for lines in sections.values():
+        texts.extend(splitter.split_text("\n".join(lines)))
+    return texts
+
+def chunk_id(service: str, text: str) -> str:
+    """Content address of a chunk; identical text in a service always maps to the same id."""
+    return hashlib.sha256(f"{service}\0{text}".encode("utf-8")).hexdigest()
+
+def build_chunk_store(files=KNOWLEDGE_BASE_FILES) -> dict:
+    """
+    Map of chunk id -> (service, chunk text) across every rules file, in
+    document order, with duplicates removed.
+    """
+    store = {}
+    for service, path in files.items():
+        for text in build_chunks(path):
+            store.setdefault(chunk_id(service, text), (service, text))
+    return store
 
 # --------------------------
 # Lazy embedding creation
 # --------------------------
-def get_embeddings():
+def _google_embeddings():
+    _ensure_event_loop()
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
     return GoogleGenerativeAIEmbeddings(
         model="models/embedding-001",
         google_api_key=GOOGLE_API_KEY
     )
 
+def _hashing_embeddings():
+    from .local_embeddings import HashingEmbeddings
+
+    return HashingEmbeddings(dimensions=EMBEDDING_DIMENSIONS)
+
+# Backend name (EMBEDDING_BACKEND) -> factory for a LangChain Embeddings object
+EMBEDDING_BACKENDS = {
+    "google": _google_embeddings,
+    "hashing": _hashing_embeddings,
+}
+
+_embeddings = None
+
+def create_embeddings(backend: str = EMBEDDING_BACKEND):
+    """Build a new embedding client for `backend`."""
+    try:
+        factory = EMBEDDING_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(
+            f"Unknown embedding backend '{backend}', expected one of {', '.join(EMBEDDING_BACKENDS)}"
+        ) from None
+    return factory()
+
+def get_embeddings():
+    """Return the process-wide embedding client, creating it on first use."""
+    global _embeddings
+    if _embeddings is None:
+        _embeddings = create_embeddings()
+    return _embeddings
+
 # --------------------------
 # Build / Save FAISS Index
 # --------------------------
-if not INDEX_PATH.exists():
-    vector_store = FAISS.from_texts(texts, get_embeddings())
-    vector_store.save_local(str(INDEX_PATH))
+# Keyword index saved next to the FAISS files
+BM25_FILE = "bm25.json"
+
+def build_bm25(chunks: dict = None) -> BM25Index:
+    """BM25 index over the chunk store (see build_chunk_store)."""
+    chunks = build_chunk_store() if chunks is None else chunks
+    return BM25Index([(cid, service, text) for cid, (service, text) in chunks.items()])
+
+def build_index(index_path=INDEX_PATH, force: bool = False) -> dict:
+    """
+    Bring the FAISS index on disk in line with the knowledge base.
+
+    Chunks are content-addressed, so an existing index is updated in place:
+    vectors for chunks that no longer exist are removed and only new or
+    changed chunks are embedded. `force` discards the index and re-embeds
+    everything. The BM25 keyword index is rebuilt from scratch alongside it,
+    which takes milliseconds. Returns counts of added, removed and
+    unchanged chunks.
+    """
+    from langchain_community.vectorstores import FAISS
+
+    index_path = Path(index_path)
+    chunks = build_chunk_store()
+
+    store = None
+    if index_path.exists() and not force:
+        store = FAISS.load_local(
+            str(index_path),
+            get_embeddings(),
+            allow_dangerous_deserialization=True
+        )
+    existing = set(store.index_to_docstore_id.values()) if store is not None else set()
+
+    removed = [cid for cid in existing if cid not in chunks]
+    added = [cid for cid in chunks if cid not in existing]
+    stats = {"added": len(added), "removed": len(removed), "unchanged": len(existing) - len(removed)}
+    if store is not None and not added and not removed:
+        if not (index_path / BM25_FILE).exists():
+            build_bm25(chunks).save(index_path / BM25_FILE)
+        logger.info(f"Knowledge-base index is up to date ({stats['unchanged']} chunks)")
+        return stats
+
+    texts = [chunks[cid][1] for cid in added]
+    metadatas = [{"service": chunks[cid][0]} for cid in added]
+    if store is None:
+        store = FAISS.from_texts(texts, get_embeddings(), metadatas=metadatas, ids=added)
+    else:
+        if removed:
+            store.delete(removed)
+        if added:
+            store.add_texts(texts, metadatas=metadatas, ids=added)
+    store.save_local(str(index_path))
+    build_bm25(chunks).save(index_path / BM25_FILE)
+    logger.info(
+        f"Updated knowledge-base index at {index_path}: "
+        f"{stats['added']} added, {stats['removed']} removed, {stats['unchanged']} unchanged"
+    )
+    return stats
+
+# --------------------------
+# Process-wide retriever
+# --------------------------
+class KnowledgeBaseRetriever:
+    """
+    Keeps the FAISS and BM25 indexes in memory for the lifetime of the process.
+
+    Each index is loaded on first use and reloaded only when its files on
+    disk change (detected via their mtime and size), so a rebuilt index is
+    picked up without restarting the app. The BM25 index loads without the
+    FAISS index or the embedding model; if it was never saved it is built
+    in memory from the rules files.
+    """
+
+    INDEX_FILES = ("index.faiss", "index.pkl")
+
+    def __init__(self, index_path=INDEX_PATH):
+        self.index_path = Path(index_path)
+        self._store = None
+        self._version = None
+        self._bm25 = None
+        self._bm25_version = None
+        self._lock = threading.Lock()
+        self.load_count = 0
+        self.hit_count = 0
+
+    def _disk_version(self, names=INDEX_FILES):
+        version = []
+        for name in names:
+            try:
+                st = (self.index_path / name).stat()
+            except FileNotFoundError:
+                return None
+            version.append((name, st.st_mtime_ns, st.st_size))
+        return tuple(version)
+
+    @property
+    def version(self):
+        """Identifier of the indexes currently on disk (None if missing)."""
+        faiss_version = self._disk_version()
+        bm25_version = self._disk_version((BM25_FILE,))
+        return None if faiss_version is None and bm25_version is None else (faiss_version, bm25_version)
+
+    def get_store(self):
+        version = self._disk_version()
+        with self._lock:
+            if self._store is not None and version == self._version:
+                self.hit_count += 1
+                return self._store
+            from langchain_community.vectorstores import FAISS
+
+            if version is None:
+                logger.warning(
+                    f"No index at {self.index_path}; building it now. "
+                    "Run `python -m agents.death.embeddings` at deploy time to avoid this."
+                )
+                build_index(self.index_path, force=True)
+                version = self._disk_version()
+            self._store = FAISS.load_local(
+                str(self.index_path),
+                get_embeddings(),
+                allow_dangerous_deserialization=True
+            )
+            self._version = version
+            self.load_count += 1
+            return self._store
+
+    def get_bm25(self) -> BM25Index:
+        version = self._disk_version((BM25_FILE,))
+        if version is None:
+            # Not saved yet: key the in-memory build on the rules content instead
+            version = ("rules", _knowledge_base_hash())
+        with self._lock:
+            if self._bm25 is not None and version == self._bm25_version:
+                return self._bm25
+            if version[0] == "rules":
+                logger.info(f"No keyword index at {self.index_path}; building it in memory")
+                self._bm25 = build_bm25()
+            else:
+                self._bm25 = BM25Index.load(self.index_path / BM25_FILE)
+            self._bm25_version = version
+            return self._bm25
+
+    def search(self, query: str, k: int = 3, service: str = None, mode: str = "vector"):
+        """
+        Top-k chunks for `query` using `mode`: "vector" (FAISS similarity),
+        "bm25" (keyword index only; no embedding is computed) or "hybrid"
+        (reciprocal rank fusion of the top KB_HYBRID_CANDIDATES of each).
+        """
+        if mode == "vector":
+            return self.vector_search(query, k, service)
+        if mode == "bm25":
+            return self.get_bm25().search(query, k=k, service=service)
+        if mode == "hybrid":
+            candidates = max(k, KB_HYBRID_CANDIDATES)
+            fused = reciprocal_rank_fusion([
+                self.get_bm25().search(query, k=candidates, service=service),
+                self.vector_search(query, candidates, service),
+            ])
+            return fused[:k]
+        raise ValueError(f"Unknown retrieval mode '{mode}', expected one of {', '.join(RETRIEVAL_MODES)}")
+
+    def vector_search(self, query: str, k: int = 3, service: str = None):
+        store = self.get_store()
+        if service is None:
+            results = store.similarity_search(query, k=k)
+        else:
+            # The knowledge base is small, so scan every vector before
+            # filtering rather than risk dropping matches past fetch_k.
+            results = store.similarity_search(
+                query, k=k, filter={"service": service}, fetch_k=store.index.ntotal
+            )
+        return [r.page_content for r in results]
+
+    def stats(self) -> dict:
+        return {"loads": self.load_count, "hits": self.hit_count}
+
+    def reset(self):
+        with self._lock:
+            self._store = None
+            self._version = None
+            self._bm25 = None
+            self._bm25_version = None
+
+_retriever = None
+_retriever_lock = threading.Lock()
+
+def get_retriever() -> KnowledgeBaseRetriever:
+    global _retriever
+    with _retriever_lock:
+        if _retriever is None:
+            _retriever = KnowledgeBaseRetriever()
+        return _retriever
+
+# --------------------------
+# Query result cache
+# --------------------------
+_query_cache = TTLCache(maxsize=KB_CACHE_SIZE, ttl=KB_CACHE_TTL)
+_disk_cache = None
+_kb_fingerprint = (None, None)
+
+def _get_disk_cache():
+    global _disk_cache
+    if _disk_cache is None and KB_CACHE_DB:
+        _disk_cache = DiskCache(KB_CACHE_DB, table="kb_queries", ttl=KB_CACHE_TTL, max_entries=KB_CACHE_SIZE * 16)
+    return _disk_cache
+
+def _knowledge_base_hash() -> str:
+    """Content hash of all rules files, recomputed only when one of their stats changes."""
+    global _kb_fingerprint
+    stat_key = []
+    for service, path in sorted(KNOWLEDGE_BASE_FILES.items()):
+        try:
+            st = os.stat(path)
+            stat_key.append((service, st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            stat_key.append((service, None, None))
+    stat_key = tuple(stat_key)
+    if _kb_fingerprint[0] != stat_key:
+        digest = hashlib.sha256()
+        for service, path in sorted(KNOWLEDGE_BASE_FILES.items()):
+            digest.update(service.encode("utf-8"))
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+        _kb_fingerprint = (stat_key, digest.hexdigest())
+    return _kb_fingerprint[1]
+
+def index_version() -> str:
+    """Version tag covering both the rules files and the index on disk."""
+    raw = f"{_knowledge_base_hash()}|{get_retriever().version}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+def clear_query_cache():
+    _query_cache.clear()
+    disk = _get_disk_cache()
+    if disk is not None:
+        disk.clear()
+
+def query_cache_stats() -> dict:
+    disk = _get_disk_cache()
+    return {
+        "memory": _query_cache.stats(),
+        "disk": disk.stats() if disk is not None else None,
+    }
 
 # --------------------------
 # Query function
 # --------------------------
-def query_embeddings(query: str, k: int = 3):
+RETRIEVAL_MODES = ("vector", "bm25", "hybrid", "auto")
+
+def resolve_mode(query: str, mode: str) -> str:
+    """Mode "auto" answers keyword queries (article numbers, field names) from BM25 alone."""
+    if mode == "auto":
+        return "bm25" if is_keyword_query(query) else "hybrid"
+    return mode
+
+def query_embeddings(query: str, k: int = 3, service: str = "death", use_cache: bool = True,
+                     mode: str = KB_RETRIEVAL_MODE):
     """
     Retrieve the top-k relevant text chunks from the knowledge base.
+
+    Results are restricted to the given service's rules; pass
+    service=None to search across every service. `mode` selects the
+    retriever (see RETRIEVAL_MODES and KnowledgeBaseRetriever.search).
     """
-    store = FAISS.load_local(
-        str(INDEX_PATH),
-        get_embeddings(),
-        allow_dangerous_deserialization=True
+    mode = resolve_mode(query, mode)
+    with span("kb.query", service=service, k=k, mode=mode) as attrs:
+        if not use_cache:
+            return get_retriever().search(query, k=k, service=service, mode=mode)
+
+        key = f"{index_version()}:{service}:{k}:{mode}:{_normalize_query(query)}"
+        results = _query_cache.get(key)
+        if results is not None:
+            attrs["cache"] = "memory"
+            return list(results)
+
+        disk = _get_disk_cache()
+        if disk is not None:
+            results = disk.get(key)
+            if results is not None:
+                attrs["cache"] = "disk"
+                _query_cache.set(key, tuple(results))
+                return results
+
+        attrs["cache"] = "miss"
+        results = get_retriever().search(query, k=k, service=service, mode=mode)
+        _query_cache.set(key, tuple(results))
+        if disk is not None:
+            disk.set(key, results)
+        return results
+
+
+# --------------------------
+# Offline index build
+# --------------------------
+# Deploy step: the index is not committed, so build it before starting the
+# app or workers (and again after editing the rules files):
+#
+#   python -m agents.death.embeddings            # incremental
+#   python -m agents.death.embeddings --force    # full rebuild
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Build or incrementally update the knowledge-base FAISS and BM25 indexes."
     )
-    results = store.similarity_search(query, k=k)
-    return [r.page_content for r in results]
+    parser.add_argument("--force", action="store_true", help="discard the existing index and re-embed every chunk")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    build_index(force=args.force)
@@ -1,22 +1,229 @@
+import hashlib
 import os
+import random
+import threading
+import time
+from collections import deque
 import requests
+from requests.adapters import HTTPAdapter
+from .cache import DiskCache
+from .tracing import span
+from .config import (
+    LLM_CONNECT_TIMEOUT, LLM_READ_TIMEOUT, LLM_MAX_RETRIES,
+    LLM_CACHE_MODE, LLM_CACHE_TTL, LLM_CACHE_DB, LLM_CACHE_MAX_BYTES,
+)
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
-
-def groq_llm_reason(prompt: str, model: str = "llama-3.1-8b-instant", max_tokens: int = 500) -> str:
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    payload = {
-        "model": model,
-        "messages": [{"role": "user", "content": prompt}],
-        "max_tokens": max_tokens
-    }
-
-    response = requests.post(GROQ_API_URL, json=payload, headers=headers)
-    response.raise_for_status()
-    data = response.json()
-    return data["choices"][0]["message"]["content"].strip()
+GROQ_API_URL = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
 
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class LLMClient:
+    """
+    Chat-completions client with a pooled HTTP session.
+
+    Connections are reused across calls. 429 and 5xx responses, connection
+    errors and timeouts are retried up to `max_retries` times with
+    full-jitter exponential backoff (honouring Retry-After, capped at
+    `backoff_max`). Latency and retry counters are available via metrics().
+    """
+
+    def __init__(self, api_url: str = GROQ_API_URL, api_key: str = GROQ_API_KEY,
+                 connect_timeout: float = LLM_CONNECT_TIMEOUT, read_timeout: float = LLM_READ_TIMEOUT,
+                 max_retries: int = LLM_MAX_RETRIES, backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 pool_size: int = 10):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        })
+
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)
+        self.request_count = 0
+        self.retry_count = 0
+        self.error_count = 0
+
+    def _backoff(self, attempt: int, retry_after=None) -> float:
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def chat(self, prompt: str, model: str = "llama-3.1-8b-instant", max_tokens: int = 500) -> str:
+        payload = {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens
+        }
+
+        attempt = 0
+        start = time.perf_counter()
+        while True:
+            retry_after = None
+            try:
+                response = self.session.post(self.api_url, json=payload, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    response.raise_for_status()
+                    break
+                retry_after = response.headers.get("Retry-After")
+                error = requests.HTTPError(f"{response.status_code} from LLM endpoint", response=response)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            except requests.HTTPError:
+                self._record(start, failed=True)
+                raise
+
+            if attempt >= self.max_retries:
+                self._record(start, failed=True)
+                raise error
+            with self._lock:
+                self.retry_count += 1
+            time.sleep(self._backoff(attempt, retry_after))
+            attempt += 1
+
+        self._record(start)
+        data = response.json()
+        return data["choices"][0]["message"]["content"].strip()
+
+    def _record(self, start: float, failed: bool = False):
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.request_count += 1
+            if failed:
+                self.error_count += 1
+            else:
+                self._latencies.append(elapsed)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            metrics = {
+                "requests": self.request_count,
+                "retries": self.retry_count,
+                "errors": self.error_count,
+            }
+        if latencies:
+            metrics.update({
+                "latency_avg": sum(latencies) / len(latencies),
+                "latency_p50": latencies[len(latencies) // 2],
+                "latency_p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+                "latency_max": latencies[-1],
+            })
+        return metrics
+
+    def close(self):
+        self.session.close()
+
+
+# --------------------------
+# Response cache
+# --------------------------
+CACHE_READ_THROUGH = "read_through"    # serve cached responses, store misses
+CACHE_WRITE_THROUGH = "write_through"  # always call the LLM, store the response
+CACHE_DISABLED = "disabled"
+CACHE_MODES = (CACHE_READ_THROUGH, CACHE_WRITE_THROUGH, CACHE_DISABLED)
+
+
+class LLMResponseCache:
+    """
+    Persistent cache of LLM responses keyed on (model, max_tokens, prompt).
+
+    Prompts are whitespace-normalized before hashing, so the indentation of
+    triple-quoted prompts does not matter. Each entry remembers how long the
+    original request took, which is counted as latency saved on every hit.
+    """
+
+    def __init__(self, path=LLM_CACHE_DB, ttl=LLM_CACHE_TTL, max_bytes=LLM_CACHE_MAX_BYTES):
+        self.store = DiskCache(path, table="llm_responses", ttl=ttl, max_bytes=max_bytes)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.latency_saved = 0.0
+
+    @staticmethod
+    def key(prompt: str, model: str, max_tokens: int) -> str:
+        normalized = " ".join(prompt.split())
+        return hashlib.sha256(f"{model}\0{max_tokens}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        entry = self.store.get(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.latency_saved += entry.get("latency", 0.0)
+        return entry["response"]
+
+    def set(self, key, response: str, latency: float):
+        self.store.set(key, {"response": response, "latency": latency})
+
+    def clear(self):
+        self.store.clear()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.store),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "latency_saved": self.latency_saved,
+            }
+
+
+_client = None
+_client_lock = threading.Lock()
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_llm_client() -> LLMClient:
+    """Process-wide client shared by every workflow run."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient()
+        return _client
+
+def get_llm_cache():
+    """Process-wide response cache, or None if LLM_CACHE_DB is empty."""
+    global _cache
+    with _cache_lock:
+        if _cache is None and LLM_CACHE_DB:
+            _cache = LLMResponseCache()
+        return _cache
+
+def groq_llm_reason(prompt: str, model: str = "llama-3.1-8b-instant", max_tokens: int = 500,
+                    cache: str = LLM_CACHE_MODE) -> str:
+    if cache not in CACHE_MODES:
+        raise ValueError(f"Unknown LLM cache mode '{cache}', expected one of {', '.join(CACHE_MODES)}")
+    with span("llm.chat", model=model, max_tokens=max_tokens, cache=cache) as attrs:
+        store = get_llm_cache() if cache != CACHE_DISABLED else None
+        if store is None:
+            return get_llm_client().chat(prompt, model=model, max_tokens=max_tokens)
+
+        key = store.key(prompt, model, max_tokens)
+        if cache == CACHE_READ_THROUGH:
+            response = store.get(key)
+            attrs["cache_hit"] = response is not None
+            if response is not None:
+                return response
+        start = time.perf_counter()
+        response = get_llm_client().chat(prompt, model=model, max_tokens=max_tokens)
+        store.set(key, response, time.perf_counter() - start)
+        return response
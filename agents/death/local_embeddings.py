@@ -0,0 +1,60 @@
+import re
+import zlib
+from functools import lru_cache
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# --------------------------
+# Local hashed n-gram embeddings
+# --------------------------
+# A stateless, offline embedding model for the small rules knowledge base.
+# Text is broken into words, word bigrams and character n-grams of each
+# word; every feature is hashed (CRC32, so vectors are stable across
+# processes) into a fixed number of signed buckets, weighted by log term
+# frequency and L2-normalized. Exact tokens such as "Art. 87" or
+# "date_of_death" land in the same buckets as in the rules text, and
+# character n-grams tolerate inflections ("registered" vs "registration").
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+class HashingEmbeddings(Embeddings):
+    def __init__(self, dimensions: int = 1024, char_ngrams=(3, 5), word_bigrams: bool = True):
+        self.dimensions = dimensions
+        self.char_ngrams = char_ngrams
+        self.word_bigrams = word_bigrams
+
+    def _features(self, text: str) -> list:
+        words = _TOKEN.findall(text.lower().replace("_", " "))
+        features = [f"w:{word}" for word in words]
+        if self.word_bigrams:
+            features.extend(f"b:{a} {b}" for a, b in zip(words, words[1:]))
+        low, high = self.char_ngrams
+        for word in words:
+            padded = f" {word} "
+            for n in range(low, high + 1):
+                features.extend(f"c:{padded[i:i + n]}" for i in range(len(padded) - n + 1))
+        return features
+
+    def embed(self, text: str) -> np.ndarray:
+        buckets = [_bucket(feature, self.dimensions) for feature in self._features(text)]
+        if not buckets:
+            return np.zeros(self.dimensions, dtype=np.float32)
+        indices, signs = zip(*buckets)
+        counts = np.bincount(indices, weights=signs, minlength=self.dimensions)
+        # log-scaled term frequency keeps long chunks from dominating
+        vector = (np.sign(counts) * np.log1p(np.abs(counts))).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed_documents(self, texts):
+        return [self.embed(text).tolist() for text in texts]
+
+    def embed_query(self, text):
+        return self.embed(text).tolist()
+
+
+@lru_cache(maxsize=65536)
+def _bucket(feature: str, dimensions: int):
+    h = zlib.crc32(feature.encode("utf-8"))
+    return h % dimensions, 1.0 if (h >> 31) & 1 else -1.0
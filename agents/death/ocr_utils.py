@@ -1,23 +1,145 @@
-from pdf2image import convert_from_path
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from pdf2image import convert_from_path, pdfinfo_from_path
 import pytesseract
+import hashlib
+import multiprocessing
+import threading
+import time
 import os
+from .cache import DiskCache
+from .tracing import get_tracer, span
+from .config import OCR_DPI, OCR_WORKERS, OCR_CACHE_DB, OCR_CACHE_MAX_BYTES
 
-def extract_text_from_file(file_path, lang="eng"):
+_pool = None
+_pool_lock = threading.Lock()
+_ocr_cache = None
+
+def _get_pool():
+    """Process pool shared by every OCR call, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=OCR_WORKERS)
+        return _pool
+
+def ocr_pdf_page(file_path, page_number, lang="eng", dpi=OCR_DPI):
+    """Render a single PDF page (1-based) and OCR it."""
+    pages = convert_from_path(file_path, dpi=dpi, first_page=page_number, last_page=page_number)
+    return "".join(pytesseract.image_to_string(page, lang=lang) for page in pages)
+
+def _iter_pdf_pages(file_path, lang, dpi):
+    """
+    Yield (page text, is last page) page by page, in order.
+
+    Pages are OCR'd in parallel on the process pool, but only OCR_WORKERS
+    pages are in flight at a time and each worker renders just its own
+    page, so memory stays bounded. Closing the generator early cancels
+    the pages not yet started.
+    """
+    page_count = pdfinfo_from_path(file_path)["Pages"]
+    # A daemonic process cannot start the pool's children; OCR in-process there
+    if page_count <= 1 or OCR_WORKERS <= 1 or multiprocessing.current_process().daemon:
+        for page_number in range(1, page_count + 1):
+            with span("ocr.page", page=page_number):
+                text = ocr_pdf_page(file_path, page_number, lang, dpi)
+            yield text, page_number == page_count
+        return
+
+    pool = _get_pool()
+    tracer = get_tracer()
+    pending = deque()
+    next_page = 1
+    try:
+        while pending or next_page <= page_count:
+            while next_page <= page_count and len(pending) < OCR_WORKERS:
+                future = pool.submit(ocr_pdf_page, file_path, next_page, lang, dpi)
+                pending.append((future, next_page, time.perf_counter()))
+                next_page += 1
+            future, page_number, submitted = pending.popleft()
+            text = future.result()
+            # Submit-to-result time of the page on the pool
+            tracer.record("ocr.page", time.perf_counter() - submitted, page=page_number, parallel=True)
+            yield text, page_number == page_count
+    finally:
+        for future, _, _ in pending:
+            future.cancel()
+
+def _iter_image_pages(file_path, lang):
+    from PIL import Image
+    with span("ocr.page", page=1):
+        img = Image.open(file_path)
+        text = pytesseract.image_to_string(img, lang=lang)
+    yield text, True
+
+# --------------------------
+# OCR result cache
+# --------------------------
+def get_ocr_cache():
+    """SQLite cache of OCR text keyed by file content, or None if disabled."""
+    global _ocr_cache
+    if _ocr_cache is None and OCR_CACHE_DB:
+        _ocr_cache = DiskCache(OCR_CACHE_DB, table="ocr_results", max_bytes=OCR_CACHE_MAX_BYTES)
+    return _ocr_cache
+
+def file_sha256(file_path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def ocr_cache_key(file_hash, lang, dpi):
+    return f"{file_hash}:{lang}:{dpi}"
+
+# --------------------------
+# Text extraction
+# --------------------------
+def iter_page_texts(file_path, lang="eng", dpi=OCR_DPI, file_hash=None):
+    """
+    Stream OCR text one page at a time (images count as a single page).
+
+    A cached result is yielded whole as a single chunk. The full text is
+    cached as soon as the last page has been OCR'd, before it is yielded, so
+    a consumer that stops on the last page (e.g. verify_document once every
+    keyword matched) still fills the cache, while one that stops earlier
+    never stores a partial result. Pass `file_hash` when the caller already
+    hashed the bytes to avoid reading the file again.
+    """
     if not os.path.exists(file_path):
-        return ""
+        return
+
+    cache = get_ocr_cache()
+    if cache is not None:
+        key = ocr_cache_key(file_hash or file_sha256(file_path), lang, dpi)
+        cached = cache.get(key)
+        if cached is not None:
+            yield cached
+            return
 
-    text = ""
+    pages = []
     try:
         if file_path.lower().endswith(".pdf"):
-            # Convert PDF pages to images
-            pages = convert_from_path(file_path)
-            for page in pages:
-                text += pytesseract.image_to_string(page, lang=lang) + "\n"
+            source = _iter_pdf_pages(file_path, lang, dpi)
         else:
-            from PIL import Image
-            img = Image.open(file_path)
-            text = pytesseract.image_to_string(img, lang=lang)
+            source = _iter_image_pages(file_path, lang)
+        with closing(source):
+            for page_text, last in source:
+                pages.append(page_text)
+                if last and cache is not None:
+                    cache.set(key, "".join(text + "\n" for text in pages).strip())
+                yield page_text
     except Exception as e:
         print("OCR error:", e)
+        return
+
+def extract_text_from_file(file_path, lang="eng", dpi=OCR_DPI, file_hash=None):
+    """
+    OCR a PDF or image file.
 
+    Results are cached by SHA-256 of the file bytes plus lang and dpi, so a
+    resubmitted document skips Tesseract.
+    """
+    text = "".join(page_text + "\n" for page_text in iter_page_texts(file_path, lang, dpi, file_hash))
     return text.strip()
@@ -0,0 +1,191 @@
+import threading
+from datetime import date, datetime
+from typing import NamedTuple
+from .config import KNOWLEDGE_BASE_FILES, LATE_REGISTRATION_DAYS
+from .embeddings import load_rules
+
+# --------------------------
+# Deterministic fraud-check rules
+# --------------------------
+# Rules are compiled from knowledge_base/death_rules.json: the checks listed
+# under death_registration.fraud_checks are enabled, and the allowed values
+# (e.g. gender) come from deceased_information. Each rule returns "pass",
+# "fail" (conclusive) or "unknown" (needs judgement). Clear-cut applications
+# are decided locally; anything with an "unknown" is escalated to the LLM.
+
+PASS, FAIL, UNKNOWN = "pass", "fail", "unknown"
+
+
+class RuleResult(NamedTuple):
+    check_type: str
+    result: str
+    reason: str = ""
+
+
+class Outcome(NamedTuple):
+    decision: str  # approved / rejected_duplicate / rejected_fraud, or None to escalate
+    results: list
+
+    @property
+    def escalate(self) -> bool:
+        return self.decision is None
+
+
+def _to_date(value):
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def _options(text) -> set:
+    """'Male / Female' -> {'male', 'female'}"""
+    if not isinstance(text, str):
+        return set()
+    separators = text.replace("/", ",").replace(" or ", ",")
+    return {part.strip().lower() for part in separators.split(",") if part.strip() and part.strip() != "-"}
+
+
+# --------------------------
+# Individual rules
+# --------------------------
+def check_duplicate(state, duplicate, today):
+    if duplicate:
+        return RuleResult("duplicate_id_check", FAIL, "a death record already exists for this citizen")
+    return RuleResult("duplicate_id_check", PASS)
+
+def check_death_dates(state, duplicate, today):
+    dob, dod = _to_date(state.get('dob')), _to_date(state.get('date_of_death'))
+    if dod is None:
+        return RuleResult("date_check", UNKNOWN, "date of death missing or unreadable")
+    if dod > today:
+        return RuleResult("date_check", FAIL, "date of death is in the future")
+    if dob is not None and dod < dob:
+        return RuleResult("date_check", FAIL, "date of death is before date of birth")
+    if dob is None:
+        return RuleResult("date_check", UNKNOWN, "date of birth missing or unreadable")
+    return RuleResult("date_check", PASS)
+
+def check_late_registration(state, duplicate, today):
+    dod = _to_date(state.get('date_of_death'))
+    if dod is not None and (today - dod).days > LATE_REGISTRATION_DAYS:
+        # Allowed with written proof, which needs a human/LLM judgement
+        return RuleResult("late_registration_check", UNKNOWN,
+                          f"registered more than {LATE_REGISTRATION_DAYS} days after death")
+    return RuleResult("late_registration_check", PASS)
+
+def check_informant(state, duplicate, today):
+    informant_id = str(state.get('informant_id') or "").strip()
+    national_id = str(state.get('national_id') or "").strip()
+    if not informant_id:
+        return RuleResult("informant_id_verification", UNKNOWN, "informant ID missing")
+    if informant_id == national_id:
+        return RuleResult("informant_id_verification", FAIL, "informant ID matches the deceased's national ID")
+    informant_name = str(state.get('informant_name') or "").strip().casefold()
+    if informant_name and informant_name == str(state.get('full_name') or "").strip().casefold():
+        return RuleResult("informant_id_verification", UNKNOWN, "informant has the same name as the deceased")
+    return RuleResult("informant_id_verification", PASS)
+
+def _documents_rule(required: int):
+    def check_documents(state, duplicate, today):
+        documents = state.get('documents') or []
+        if not documents:
+            return RuleResult("document_verification", UNKNOWN, "no supporting documents uploaded")
+        if not state.get('documents_verified') or not all(doc.get('verified') for doc in documents):
+            return RuleResult("document_verification", UNKNOWN, "documents not verified")
+        if len(documents) < required:
+            return RuleResult("document_verification", UNKNOWN,
+                              f"{len(documents)} document(s) uploaded, {required} required")
+        return RuleResult("document_verification", PASS)
+    return check_documents
+
+def _unconditional(required_documents) -> int:
+    """Number of required documents that apply to every registration ('(if ...)' ones are conditional)."""
+    if not isinstance(required_documents, dict):
+        return 1
+    return max(1, sum(1 for text in required_documents.values() if "(if " not in str(text).lower()))
+
+def _gender_rule(allowed):
+    def check_gender(state, duplicate, today):
+        gender = str(state.get('gender') or "").strip().lower()
+        if not gender or gender in allowed:
+            return RuleResult("gender_check", PASS)
+        return RuleResult("gender_check", UNKNOWN, f"unexpected gender '{state.get('gender')}'")
+    return check_gender
+
+# Checks named in death_rules.json -> rule implementation
+FRAUD_CHECK_RULES = {
+    "duplicate_id_check": check_duplicate,
+    "late_registration_check": check_late_registration,
+    "informant_id_verification": check_informant,
+}
+
+
+class RuleEngine:
+    def __init__(self, rules):
+        self.rules = rules
+        self._lock = threading.Lock()
+        self.decided = 0
+        self.escalated = 0
+
+    @classmethod
+    def from_knowledge_base(cls, path=KNOWLEDGE_BASE_FILES["death"]):
+        spec = load_rules(path).get("death_registration", {})
+        rules = [check_death_dates, _documents_rule(_unconditional(spec.get("required_documents")))]
+        for name in spec.get("fraud_checks", {}):
+            if name in FRAUD_CHECK_RULES:
+                rules.append(FRAUD_CHECK_RULES[name])
+        if check_duplicate not in rules:
+            rules.append(check_duplicate)  # duplicates are always conclusive
+        allowed_genders = _options(spec.get("deceased_information", {}).get("gender"))
+        if allowed_genders:
+            rules.append(_gender_rule(allowed_genders))
+        return cls(rules)
+
+    def evaluate(self, state: dict, duplicate: bool, today: date = None) -> Outcome:
+        today = today or date.today()
+        results = [rule(state, duplicate, today) for rule in self.rules]
+
+        failed = {r.check_type for r in results if r.result == FAIL}
+        if "duplicate_id_check" in failed:
+            decision = "rejected_duplicate"
+        elif failed:
+            decision = "rejected_fraud"
+        elif all(r.result == PASS for r in results):
+            decision = "approved"
+        else:
+            decision = None
+
+        with self._lock:
+            if decision is None:
+                self.escalated += 1
+            else:
+                self.decided += 1
+        return Outcome(decision, results)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            total = self.decided + self.escalated
+            return {
+                "applications": total,
+                "decided_locally": self.decided,
+                "escalated_to_llm": self.escalated,
+                "escalation_rate": self.escalated / total if total else 0.0,
+            }
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_rule_engine() -> RuleEngine:
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = RuleEngine.from_knowledge_base()
+        return _engine
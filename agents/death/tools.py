@@ -1,9 +1,7 @@
-import os
-from datetime import datetime
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from .config import CERTIFICATES_PATH, CERTIFICATE_PREFIX
-from agents.death.ocr_utils import extract_text_from_file
+import re
+import unicodedata
+from .certificates import render_certificate
+from agents.death.ocr_utils import iter_page_texts
 from db.database import get_connection
 
 # Fraud check
@@ -12,38 +10,74 @@ def check_duplicate_death(citizen_id):
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM death_records WHERE citizen_id=?", (citizen_id,))
     exists = cursor.fetchone() is not None
-    conn.close()
     return exists
 
+# Keyword normalization for OCR matching
+_WHITESPACE = re.compile(r"\s+")
+
+def _ascii_digit(ch):
+    # Ethiopic digits ፩..፱ (U+1369..U+1371) are not Unicode decimals
+    if "\u1369" <= ch <= "\u1371":
+        return str(ord(ch) - 0x1368)
+    value = unicodedata.decimal(ch, None)
+    return str(value) if value is not None else ch
+
+def normalize_for_match(text):
+    """Fold digits from any script to ASCII, collapse whitespace to one space and casefold."""
+    text = unicodedata.normalize("NFKC", text)
+    text = "".join(_ascii_digit(ch) if not ch.isascii() else ch for ch in text)
+    return _WHITESPACE.sub(" ", text).strip().casefold()
+
+def keyword_pattern(keyword):
+    """
+    Regex for a normalized keyword. A space between two of the keyword's own
+    digit groups ("1234 5678") is optional, so the ID matches printed with or
+    without that grouping; every other space must be present. A keyword
+    starting or ending with a digit must not run into neighbouring digits,
+    so "1234" does not match inside "912345" or across "12" "34".
+    """
+    parts = keyword.split(" ")
+    pattern = re.escape(parts[0])
+    for previous, part in zip(parts, parts[1:]):
+        separator = " ?" if previous[-1:].isdigit() and part[:1].isdigit() else " "
+        pattern += separator + re.escape(part)
+    if keyword[:1].isdigit():
+        pattern = r"(?<!\d)" + pattern
+    if keyword[-1:].isdigit():
+        pattern += r"(?!\d)"
+    return re.compile(pattern)
+
 # Document verification (using OCR)
-def verify_document(file_path, required_keywords=[]):
-    text = extract_text_from_file(file_path)
-    for keyword in required_keywords:
-        if keyword not in text:
-            return False
-    return True
+def verify_document(file_path, required_keywords=[], file_hash=None):
+    """
+    Check that every required keyword appears in the document's OCR text.
+
+    OCR is consumed page by page and stops as soon as all keywords have
+    been seen, so an ID on page one skips OCR of the remaining pages.
+    """
+    keywords = {normalize_for_match(k) for k in required_keywords}
+    keywords.discard("")
+    if not keywords:
+        return True
+    pending = [keyword_pattern(k) for k in keywords]
+
+    # Keep enough of the previous page to match a keyword split across pages,
+    # plus one character for the digit-boundary check
+    overlap = max(len(k) for k in keywords)
+    tail = ""
+    pages = iter_page_texts(file_path, file_hash=file_hash)
+    try:
+        for page_text in pages:
+            # Pages are separated by a space, so digits never join across a page break
+            window = f"{tail} {normalize_for_match(page_text)}" if tail else normalize_for_match(page_text)
+            pending = [p for p in pending if not p.search(window)]
+            if not pending:
+                return True
+            tail = window[-overlap:]
+    finally:
+        pages.close()
+    return False
 
 # Certificate generator
 def generate_certificate(death_record):
-    certificate_number = f"{CERTIFICATE_PREFIX}-{death_record['record_id']:04d}"
-    file_name = f"{certificate_number}.pdf"
-    file_path = os.path.join(CERTIFICATES_PATH, file_name)
-
-    os.makedirs(CERTIFICATES_PATH, exist_ok=True)
-
-    c = canvas.Canvas(file_path, pagesize=A4)
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(100, 800, "Death Certificate")
-    c.setFont("Helvetica", 12)
-    c.drawString(100, 770, f"Certificate Number: {certificate_number}")
-    c.drawString(100, 750, f"Full Name: {death_record['full_name']}")
-    c.drawString(100, 730, f"National ID: {death_record['national_id']}")
-    c.drawString(100, 710, f"Date of Death: {death_record['date_of_death']}")
-    c.drawString(100, 690, f"Place of Death: {death_record['place_of_death']}")
-    c.drawString(100, 670, f"Cause of Death: {death_record['cause_of_death']}")
-    c.drawString(100, 650, f"Informant: {death_record['informant_name']}")
-    c.drawString(100, 630, f"Date Registered: {datetime.now().strftime('%Y-%m-%d')}")
-    c.showPage()
-    c.save()
-
-    return file_path, certificate_number
+    return render_certificate(death_record)
@@ -0,0 +1,201 @@
+import os
+import json
+import math
+import time
+import uuid
+import inspect
+import threading
+import contextvars
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from functools import wraps
+from .config import TRACE_LOG_PATH, TRACE_MAX_VALUE_CHARS
+
+# --------------------------
+# Workflow tracing
+# --------------------------
+# Spans record the wall time of each graph node and of each external call
+# (OCR page, knowledge-base query, LLM request, DB write). Spans of one
+# workflow run share a trace_id; the current span travels in a contextvar,
+# so it follows asyncio tasks and asyncio.to_thread workers. Finished spans
+# are appended as JSON lines to TRACE_LOG_PATH (empty disables the export)
+# and kept in a bounded in-memory window for p50/p95/p99 summaries.
+#
+#   python -m agents.death.tracing [logs/traces.jsonl]   # summarize a trace log
+
+_current_span = contextvars.ContextVar("death_workflow_span", default=None)
+
+
+def _percentile(values: list, q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    rank = math.ceil(q / 100 * len(values))
+    return values[max(0, min(len(values), rank) - 1)]
+
+def summarize(durations: dict) -> dict:
+    """{name: [seconds]} -> {name: {count, mean, p50, p95, p99, max}} in milliseconds."""
+    summary = {}
+    for name, values in sorted(durations.items()):
+        values = sorted(values)
+        if not values:
+            continue
+        summary[name] = {
+            "count": len(values),
+            "mean_ms": sum(values) / len(values) * 1000,
+            "p50_ms": _percentile(values, 50) * 1000,
+            "p95_ms": _percentile(values, 95) * 1000,
+            "p99_ms": _percentile(values, 99) * 1000,
+            "max_ms": values[-1] * 1000,
+        }
+    return summary
+
+
+class Tracer:
+    def __init__(self, path=TRACE_LOG_PATH, window: int = 10000):
+        self.path = path
+        self._durations = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+        self._file = None
+        self._pid = None
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        """
+        Time the enclosed block. Yields the span's attribute dict, which the
+        block may extend (e.g. with a cache-hit flag) before it is exported.
+        """
+        parent = _current_span.get()
+        trace_id = parent[0] if parent else uuid.uuid4().hex
+        span_id = uuid.uuid4().hex[:16]
+        token = _current_span.set((trace_id, span_id))
+        started = time.time()
+        start = time.perf_counter()
+        error = None
+        try:
+            yield attrs
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            self._finish(name, time.perf_counter() - start, started, trace_id, span_id,
+                         parent[1] if parent else None, attrs, error)
+
+    def record(self, name: str, duration: float, **attrs):
+        """Record a span measured elsewhere (e.g. a page OCR'd on the process pool)."""
+        parent = _current_span.get()
+        self._finish(name, duration, time.time() - duration, parent[0] if parent else uuid.uuid4().hex,
+                     uuid.uuid4().hex[:16], parent[1] if parent else None, attrs, None)
+
+    def _finish(self, name, duration, started, trace_id, span_id, parent_id, attrs, error):
+        with self._lock:
+            self._durations[name].append(duration)
+        if not self.path:
+            return
+        line = json.dumps({
+            "trace_id": trace_id,
+            "span_id": span_id,
+            "parent_id": parent_id,
+            "name": name,
+            "start": started,
+            "duration_ms": round(duration * 1000, 3),
+            "attrs": attrs,
+            "error": error,
+        }, default=str)
+        with self._lock:
+            if self._file is None or self._pid != os.getpid():
+                # (Re)open after a fork so worker processes don't share a buffer
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+                self._pid = os.getpid()
+            # One write per line keeps lines from different worker processes intact
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def summary(self) -> dict:
+        with self._lock:
+            durations = {name: list(values) for name, values in self._durations.items()}
+        return summarize(durations)
+
+    def reset(self):
+        with self._lock:
+            self._durations.clear()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+def get_tracer() -> Tracer:
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer()
+        return _tracer
+
+def span(name: str, **attrs):
+    return get_tracer().span(name, **attrs)
+
+def traced_node(name: str, func):
+    """Wrap a LangGraph node (sync or async) in a `node.<name>` span."""
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_node(state):
+            with span(f"node.{name}"):
+                return await func(state)
+        return async_node
+
+    @wraps(func)
+    def node(state):
+        with span(f"node.{name}"):
+            return func(state)
+    return node
+
+# --------------------------
+# Lazy state logging
+# --------------------------
+def _short(value, limit: int) -> str:
+    if hasattr(value, "name") and hasattr(value, "read"):
+        return f"<file {value.name}>"  # don't repr uploaded file objects
+    text = repr(value)
+    return text if len(text) <= limit else f"{text[:limit]}... ({len(text)} chars)"
+
+class StateSummary:
+    """
+    Formats a workflow state only when a log record is actually emitted,
+    e.g. logger.debug("State: %s", StateSummary(state)), with every value
+    truncated to `limit` characters.
+    """
+
+    def __init__(self, state: dict, limit: int = TRACE_MAX_VALUE_CHARS):
+        self.state = state
+        self.limit = limit
+
+    def __str__(self):
+        return "{" + ", ".join(
+            f"{key!r}: {_short(value, self.limit)}" for key, value in self.state.items()
+        ) + "}"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Summarize span latencies from a trace log.")
+    parser.add_argument("path", nargs="?", default=TRACE_LOG_PATH)
+    args = parser.parse_args()
+
+    durations = defaultdict(list)
+    with open(args.path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                durations[record["name"]].append(record["duration_ms"] / 1000)
+
+    print(f"{'span':<36} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, stats in summarize(durations).items():
+        print(f"{name:<36} {stats['count']:>7} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} "
+              f"{stats['p99_ms']:>9.1f} {stats['max_ms']:>9.1f}")
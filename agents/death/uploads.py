@@ -0,0 +1,124 @@
+import os
+import uuid
+import hashlib
+from .config import DOCUMENTS_PATH, UPLOAD_MAX_FILE_BYTES, UPLOAD_MAX_APPLICATION_BYTES, UPLOAD_CHUNK_SIZE
+
+# --------------------------
+# Content-addressed upload store
+# --------------------------
+# Each upload is streamed to disk in UPLOAD_CHUNK_SIZE chunks and hashed on
+# the way, then moved to DOCUMENTS_PATH/<sha[:2]>/<sha><ext>. Identical files
+# share one copy, and two applicants who both upload "id.pdf" no longer
+# overwrite each other. Downstream stages get a dict with the stored path
+# and hash, so nothing has to re-read or re-hash the bytes.
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+def _chunks(file_obj, chunk_size):
+    """Yield the file's bytes in chunks without copying the whole upload."""
+    if hasattr(file_obj, "read"):
+        if hasattr(file_obj, "seek"):
+            file_obj.seek(0)
+        yield from iter(lambda: file_obj.read(chunk_size), b"")
+    else:
+        buffer = memoryview(file_obj.getbuffer())
+        for start in range(0, len(buffer), chunk_size):
+            yield buffer[start:start + chunk_size]
+
+
+class UploadStore:
+    def __init__(self, root=DOCUMENTS_PATH, max_file_bytes=UPLOAD_MAX_FILE_BYTES,
+                 max_application_bytes=UPLOAD_MAX_APPLICATION_BYTES, chunk_size=UPLOAD_CHUNK_SIZE):
+        self.root = root
+        self.max_file_bytes = max_file_bytes
+        self.max_application_bytes = max_application_bytes
+        self.chunk_size = chunk_size
+
+    def path_for(self, sha256: str, file_name: str) -> str:
+        ext = os.path.splitext(file_name)[1].lower()
+        return os.path.join(self.root, sha256[:2], f"{sha256}{ext}")
+
+    def save(self, file_obj, budget: int = None) -> dict:
+        """
+        Stream one upload into the store and return
+        {file_name, file_path, sha256, size}. Raises UploadTooLarge as soon
+        as the file exceeds max_file_bytes (or the remaining `budget`).
+        """
+        return self._save(file_obj, budget)[0]
+
+    def _save(self, file_obj, budget: int = None):
+        """save(), plus whether this call wrote a new file into the store."""
+        file_name = os.path.basename(file_obj.name)
+        limit = self.max_file_bytes if budget is None else min(self.max_file_bytes, budget)
+        declared = getattr(file_obj, "size", None)
+        if isinstance(declared, int) and declared > limit:
+            raise UploadTooLarge(self._too_large_message(file_name, limit))
+
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = os.path.join(self.root, f".upload-{uuid.uuid4().hex}.part")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(tmp_path, "wb") as f:
+                for chunk in _chunks(file_obj, self.chunk_size):
+                    size += len(chunk)
+                    if size > limit:
+                        raise UploadTooLarge(self._too_large_message(file_name, limit))
+                    digest.update(chunk)
+                    f.write(chunk)
+
+            sha256 = digest.hexdigest()
+            file_path = self.path_for(sha256, file_name)
+            created = not os.path.exists(file_path)
+            if not created:
+                os.remove(tmp_path)  # already stored: same bytes, same path
+            else:
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                os.replace(tmp_path, file_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return {"file_name": file_name, "file_path": file_path, "sha256": sha256, "size": size}, created
+
+    def save_all(self, files) -> list:
+        """
+        Store every upload of one application, enforcing the per-application
+        limit. If any file is rejected, files this call added to the store
+        are removed again, so a rejected application leaves nothing behind.
+        """
+        stored = []
+        created = []
+        remaining = self.max_application_bytes
+        try:
+            for file_obj in files or []:
+                upload, new = self._save(file_obj, budget=remaining)
+                if new:
+                    created.append(upload["file_path"])
+                remaining -= upload["size"]
+                stored.append(upload)
+        except BaseException:
+            for file_path in created:
+                try:
+                    os.remove(file_path)
+                except FileNotFoundError:
+                    pass
+            raise
+        return stored
+
+    def _too_large_message(self, file_name, limit):
+        if limit < self.max_file_bytes:
+            return f"Uploads exceed the {self.max_application_bytes / (1024 * 1024):g} MB limit per application"
+        return f"{file_name} is larger than the {self.max_file_bytes / (1024 * 1024):g} MB limit per file"
+
+
+_store = None
+
+def get_upload_store() -> UploadStore:
+    global _store
+    if _store is None:
+        _store = UploadStore()
+    return _store
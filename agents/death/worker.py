@@ -0,0 +1,145 @@
+import os
+import time
+import socket
+import logging
+import sqlite3
+import argparse
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from db import job_queue
+from .config import JOB_WORKERS, JOB_POLL_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# --------------------------
+# Background registration workers
+# --------------------------
+# The Streamlit form only enqueues a job (see submit_death_registration);
+# worker processes started with `python -m agents.death.worker` claim jobs
+# from the SQLite queue and run the LangGraph workflow. The number of
+# workers is independent of the number of UI sessions.
+
+JOB_KIND = "death_registration"
+
+# Final-state keys kept as the job result (the rest is workflow internals)
+RESULT_KEYS = (
+    "status", "citizen_id", "record_id", "certificate_number", "certificate_path",
+    "documents", "documents_verified", "fraud_checks",
+)
+
+
+def submit_death_registration(data: dict) -> int:
+    """
+    Queue a death registration and return its job id.
+
+    `data` has the same keys as run_death_registration's initial state,
+    except that `uploaded_files` must be stored uploads (see
+    UploadStore.save_all) or paths of already-saved files.
+    """
+    return job_queue.enqueue(JOB_KIND, data)
+
+def get_registration_status(job_id: int):
+    """Job dict with status (queued / running / done / failed) and result."""
+    return job_queue.get_job(job_id)
+
+def process_job(job: dict) -> dict:
+    # Imported here so `submit_death_registration` stays cheap for the UI
+    from .workflow import run_death_registration
+
+    final_state = run_death_registration(dict(job["payload"]))
+    return {key: final_state.get(key) for key in RESULT_KEYS}
+
+@contextmanager
+def _keep_lease(job: dict, worker: str):
+    """Renew the job's lease in the background while the enclosed block runs."""
+    stop = threading.Event()
+    interval = max(1.0, job_queue.JOB_LEASE_SECONDS / 3)
+
+    def renew():
+        while not stop.wait(interval):
+            try:
+                if not job_queue.heartbeat(job["job_id"], worker):
+                    logger.warning(f"Worker {worker} lost the lease on job {job['job_id']}")
+                    return
+            except sqlite3.Error as e:
+                logger.warning(f"Heartbeat for job {job['job_id']} failed: {e}")
+
+    thread = threading.Thread(target=renew, name=f"lease-{job['job_id']}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+def run_worker(poll_interval: float = JOB_POLL_INTERVAL, max_jobs: int = None):
+    """Claim and run jobs until interrupted (or `max_jobs` have been processed)."""
+    name = f"{socket.gethostname()}:{os.getpid()}"
+    # Warm the duplicate index now so the first applicant doesn't pay for the scan
+    from db.database import init_db
+    from db.duplicate_index import get_duplicate_index
+    init_db()  # a worker may start before anything has created the schema
+    start = time.perf_counter()
+    index = get_duplicate_index()
+    logger.info(f"Worker {name} loaded {len(index):,} death records into the duplicate index "
+                f"in {time.perf_counter() - start:.2f}s")
+    logger.info(f"Worker {name} waiting for jobs")
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        try:
+            job = job_queue.claim(name, kinds=[JOB_KIND])
+        except sqlite3.OperationalError as e:
+            # e.g. the database is locked by a bulk import; keep the worker alive
+            logger.warning(f"Worker {name} could not claim a job ({e}); retrying")
+            time.sleep(poll_interval)
+            continue
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+        logger.info(f"Worker {name} running job {job['job_id']} (attempt {job['attempts']})")
+        try:
+            with _keep_lease(job, name):
+                result = process_job(job)
+        except Exception as e:
+            logger.exception(f"Job {job['job_id']} failed")
+            job_queue.fail(job["job_id"], f"{type(e).__name__}: {e}")
+        else:
+            job_queue.complete(job["job_id"], result)
+            logger.info(f"Job {job['job_id']} finished: {result['status']}")
+        processed += 1
+
+def start_workers(count: int = JOB_WORKERS, poll_interval: float = JOB_POLL_INTERVAL) -> list:
+    """
+    Start `count` worker processes and return them.
+
+    Workers are not daemonic: a daemonic process may not have children, and
+    each worker OCRs multi-page PDFs on its own process pool. Callers stop
+    them with terminate() (see the CLI below).
+    """
+    workers = []
+    for i in range(count):
+        process = multiprocessing.Process(
+            target=run_worker, args=(poll_interval,), name=f"death-worker-{i}"
+        )
+        process.start()
+        workers.append(process)
+    return workers
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run background death-registration workers.")
+    parser.add_argument("--workers", type=int, default=JOB_WORKERS, help="number of worker processes")
+    parser.add_argument("--poll-interval", type=float, default=JOB_POLL_INTERVAL,
+                        help="seconds to wait when the queue is empty")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    processes = start_workers(args.workers, args.poll_interval)
+    print(f"Started {len(processes)} worker(s); press Ctrl+C to stop")
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
@@ -1,13 +1,20 @@
 import os
+import re
+import json
+import asyncio
 import logging
 from typing import TypedDict
-from datetime import datetime
+from datetime import date, datetime
 from langgraph.graph import StateGraph, END, START
-from db.database import add_citizen, add_informant, add_death_record, get_citizen_by_id
+from db.database import get_citizen_by_id, register_death
+from db.duplicate_index import get_duplicate_index
 from agents.death.tools import check_duplicate_death, verify_document, generate_certificate
 from .embeddings import query_embeddings
-from .config import DOCUMENTS_PATH
-from .llm import groq_llm_reason  # LLM wrapper
+from .config import LLM_BATCH_VERIFICATION, WORKFLOW_CONCURRENCY
+from .llm import groq_llm_reason, CACHE_DISABLED  # LLM wrapper
+from .rules import get_rule_engine
+from .uploads import get_upload_store
+from .tracing import span, traced_node, StateSummary
 
 # --------------------------
 # Logging Setup
@@ -35,7 +42,10 @@ class DeathRegistrationState(TypedDict):
     informant_id: str
     relation: str
     uploaded_files: list
+    documents: list
     documents_verified: bool
+    fraud_kb_context: list
+    fraud_checks: list
     status: str
     certificate_number: str
     certificate_path: str
@@ -45,94 +55,199 @@ class DeathRegistrationState(TypedDict):
 # Node Functions
 # --------------------------
 def collect_citizen_data(state: dict) -> dict:
+    # Read-only: all rows are written together by db_insert once approved
     logger.info("=== Collecting Citizen Data ===")
     citizen = get_citizen_by_id(state['national_id'])
     if citizen:
         state['citizen_id'] = citizen[0]
         logger.info(f"Citizen already exists: {state['citizen_id']}")
     else:
-        state['citizen_id'] = add_citizen(
-            state['full_name'], state['national_id'], state['gender'], state['dob']
-        )
-        logger.info(f"New citizen added: {state['citizen_id']}")
+        state['citizen_id'] = None
+        logger.info("Citizen not yet registered")
+    return state
 
-    state['informant_id'] = add_informant(
-        state['informant_name'], state['informant_id'], state['relation']
+def _parse_llm_verdict(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ['true', 'yes', 'approved']
+
+def _verify_document_llm(state: dict, doc: dict, kb_context) -> bool:
+    """Ask the LLM about a single document."""
+    llm_prompt = f"""
+    You are an AI agent assisting with death registration.
+    OCR verified: {doc['ocr_verified']}.
+    Uploaded file: {doc['file_name']}.
+    Knowledge base context: {kb_context}.
+    Citizen: {state['full_name']} ({state['national_id']}).
+    Decide if this document is valid for registration (return True/False).
+    """
+    return _parse_llm_verdict(groq_llm_reason(llm_prompt))
+
+def _verify_documents_batched(state: dict, docs: list, kb_context) -> dict:
+    """
+    Ask the LLM about every document in one request.
+
+    Returns {document index: verdict} for the documents the response covered;
+    an unparseable response yields an empty dict.
+    """
+    listing = "\n".join(
+        f"        {i}. {doc['file_name']} (OCR verified: {doc['ocr_verified']})"
+        for i, doc in enumerate(docs, start=1)
     )
-    logger.info(f"Informant added: {state['informant_id']}")
-    return state
+    llm_prompt = f"""
+    You are an AI agent assisting with death registration.
+    Knowledge base context: {kb_context}.
+    Citizen: {state['full_name']} ({state['national_id']}).
+    Uploaded documents:
+{listing}
+    Decide if each document is valid for registration.
+    Reply with only a JSON object mapping each document number to true or false, e.g. {{"1": true, "2": false}}.
+    """
+    response = groq_llm_reason(llm_prompt, max_tokens=50 + 10 * len(docs))
+    match = re.search(r"\{.*\}", response, re.DOTALL)
+    try:
+        verdicts = json.loads(match.group(0)) if match else None
+    except json.JSONDecodeError:
+        verdicts = None
+    if not isinstance(verdicts, dict):
+        logger.warning("Could not parse batched document verdicts; falling back to per-file checks")
+        return {}
 
-def collect_documents(state: dict) -> dict:
-    logger.info("=== Collecting and Verifying Documents ===")
-    os.makedirs(DOCUMENTS_PATH, exist_ok=True)
-    verified_docs = []
+    decisions = {}
+    for key, value in verdicts.items():
+        try:
+            index = int(str(key).strip().rstrip("."))
+        except ValueError:
+            continue
+        if 1 <= index <= len(docs):
+            decisions[index - 1] = _parse_llm_verdict(value)
+    return decisions
 
-    for file_obj in state.get('uploaded_files', []):
-        file_path = os.path.join(DOCUMENTS_PATH, file_obj.name)
-        with open(file_path, "wb") as f:
-            f.write(file_obj.getbuffer())
-        logger.info(f"Saved uploaded file: {file_obj.name}")
+def _save_and_ocr(state: dict, upload) -> dict:
+    """
+    Run OCR verification on one upload.
 
-        # OCR verification
-        ocr_verified = verify_document(file_path, required_keywords=[state['national_id']])
-        logger.info(f"OCR verification for {file_obj.name}: {ocr_verified}")
+    `upload` is a stored upload from UploadStore ({file_name, file_path,
+    sha256}), the path of an already-saved file, or a raw file object, which
+    is streamed into the upload store first.
+    """
+    if isinstance(upload, (str, os.PathLike)):
+        upload = {"file_name": os.path.basename(upload), "file_path": os.fspath(upload)}
+    elif not isinstance(upload, dict):
+        upload = get_upload_store().save(upload)
+        logger.info(f"Saved uploaded file: {upload['file_name']}")
 
-        # LLM assisted reasoning with embeddings
-        kb_context = query_embeddings("Required documents for death registration")
-        llm_prompt = f"""
-        You are an AI agent assisting with death registration.
-        OCR verified: {ocr_verified}.
-        Uploaded file: {file_obj.name}.
-        Knowledge base context: {kb_context}.
-        Citizen: {state['full_name']} ({state['national_id']}).
-        Decide if this document is valid for registration (return True/False).
-        """
-        llm_decision = groq_llm_reason(llm_prompt).lower() in ['true', 'yes', 'approved']
-        logger.info(f"LLM decision for {file_obj.name}: {llm_decision}")
+    # OCR verification (the stored hash doubles as the OCR cache key)
+    ocr_verified = verify_document(upload['file_path'], required_keywords=[state['national_id']],
+                                   file_hash=upload.get('sha256'))
+    logger.info(f"OCR verification for {upload['file_name']}: {ocr_verified}")
+    return {"file_name": upload['file_name'], "file_path": upload['file_path'], "ocr_verified": ocr_verified}
 
+def _document_results(docs: list, llm_decisions: dict) -> dict:
+    verified_docs = []
+    for i, doc in enumerate(docs):
+        logger.info(f"LLM decision for {doc['file_name']}: {llm_decisions[i]}")
         verified_docs.append({
-            "file_name": file_obj.name,
-            "file_path": file_path,
-            "verified": ocr_verified and llm_decision
+            "file_name": doc['file_name'],
+            "file_path": doc['file_path'],
+            "verified": doc['ocr_verified'] and llm_decisions[i]
         })
+    documents_verified = all(doc['verified'] for doc in verified_docs)
+    logger.info(f"All documents verified: {documents_verified}")
+    return {"documents": verified_docs, "documents_verified": documents_verified}
 
-    state['documents'] = verified_docs
-    state['documents_verified'] = all(doc['verified'] for doc in verified_docs)
-    logger.info(f"All documents verified: {state['documents_verified']}")
+def collect_documents(state: dict) -> dict:
+    logger.info("=== Collecting and Verifying Documents ===")
+    docs = [_save_and_ocr(state, file_obj) for file_obj in state.get('uploaded_files', [])]
+
+    # LLM assisted reasoning with embeddings
+    llm_decisions = {}
+    if docs:
+        kb_context = query_embeddings("Required documents for death registration")
+        if LLM_BATCH_VERIFICATION and len(docs) > 1:
+            llm_decisions = _verify_documents_batched(state, docs, kb_context)
+        for i, doc in enumerate(docs):
+            if i not in llm_decisions:
+                llm_decisions[i] = _verify_document_llm(state, doc, kb_context)
+
+    state.update(_document_results(docs, llm_decisions))
     return state
 
 def fraud_check(state: dict) -> dict:
     logger.info("=== Performing Fraud Check ===")
+    # In-memory pre-check: a known duplicate is conclusive, so skip the LLM
+    if get_duplicate_index().is_duplicate(state.get('citizen_id'), state.get('national_id')):
+        state['status'] = 'rejected_duplicate'
+        state['fraud_checks'] = [{"check_type": "duplicate_id_check", "result": "fail"}]
+        logger.info("Fraud check decision: rejected_duplicate (duplicate index)")
+        return state
+
     duplicate_check = check_duplicate_death(state['citizen_id'])
-    kb_context = query_embeddings("Fraud checks for death registration")
+
+    # Deterministic rules decide clear-cut cases; only ambiguous ones reach the LLM
+    outcome = get_rule_engine().evaluate(state, duplicate_check)
+    state['fraud_checks'] = [
+        {"check_type": r.check_type, "result": r.result} for r in outcome.results
+    ]
+    if not outcome.escalate:
+        state['status'] = outcome.decision
+        logger.info(f"Fraud check decision: {outcome.decision} (rules)")
+        return state
+
+    open_questions = "; ".join(f"{r.check_type}: {r.reason}" for r in outcome.results if r.result != "pass")
+    kb_context = state.get('fraud_kb_context') or query_embeddings("Fraud checks for death registration")
     llm_prompt = f"""
     You are an AI agent for fraud detection in death registration.
     Citizen ID: {state['citizen_id']}.
+    Deceased: {state.get('full_name')} (national ID {state.get('national_id')}).
+    Date of birth: {state.get('dob')}. Date of death: {state.get('date_of_death')}.
+    Informant: {state.get('informant_name')} (ID {state.get('informant_id')}), relation: {state.get('relation')}.
+    Application date: {date.today().isoformat()}.
     Duplicate check result: {duplicate_check}.
     Documents verified: {state.get('documents_verified')}.
+    Rule checks needing judgement: {open_questions}.
     Knowledge base: {kb_context}.
     Decide the registration status: approved, rejected_duplicate, or rejected_fraud.
     """
-    decision = groq_llm_reason(llm_prompt).strip().lower()
+    # A verdict on one applicant must never be replayed for another
+    decision = groq_llm_reason(llm_prompt, cache=CACHE_DISABLED).strip().lower()
     if decision not in ['approved', 'rejected_duplicate', 'rejected_fraud']:
         decision = 'rejected_duplicate' if duplicate_check else 'approved'
     state['status'] = decision
-    logger.info(f"Fraud check decision: {decision}")
+    state['fraud_checks'].append({"check_type": "llm_decision", "result": decision})
+    logger.info(f"Fraud check decision: {decision} (LLM)")
     return state
 
 def db_insert(state: dict) -> dict:
     logger.info("=== Inserting into Database ===")
     if state.get('status') == 'approved':
-        record_id = add_death_record(
-            citizen_id=state['citizen_id'],
-            date_of_death=state['date_of_death'],
-            place=state['place_of_death'],
-            cause=state['cause_of_death'],
-            informant_id=state['informant_id'],
-            certificate_number=None
-        )
-        state['record_id'] = record_id
-        logger.info(f"Death record added: {record_id}")
+        with span("db.register_death"):
+            result = register_death(
+                citizen={
+                    "full_name": state['full_name'],
+                    "national_id": state['national_id'],
+                    "gender": state.get('gender'),
+                    "dob": state.get('dob'),
+                },
+                informant={
+                    "full_name": state['informant_name'],
+                    "id_number": state['informant_id'],
+                    "relation": state.get('relation'),
+                },
+                death_record={
+                    "date_of_death": state['date_of_death'],
+                    "place_of_death": state['place_of_death'],
+                    "cause_of_death": state['cause_of_death'],
+                },
+                documents=state.get('documents') or [],
+                fraud_checks=state.get('fraud_checks') or [],
+            )
+        state['citizen_id'] = result['citizen_id']
+        state['record_id'] = result['record_id']
+        if result['created']:
+            logger.info(f"Death record added: {result['record_id']}")
+        else:
+            logger.info(f"Death record already exists: {result['record_id']}")
     return state
 
 def certificate_gen(state: dict) -> dict:
@@ -158,15 +273,68 @@ def certificate_gen(state: dict) -> dict:
         logger.info(f"Mock certificate path set: {state['certificate_path']}")
     return state
 
+# --------------------------
+# Async Node Functions
+# --------------------------
+async def acollect_documents(state: dict) -> dict:
+    """
+    Async counterpart of collect_documents.
+
+    Each upload is stored and OCR'd in a worker thread, at most
+    WORKFLOW_CONCURRENCY at a time, while the knowledge-base lookup runs
+    alongside. Returns only the keys it sets so it can run in parallel
+    with prefetch_fraud_context.
+    """
+    logger.info("=== Collecting and Verifying Documents (async) ===")
+    uploads = state.get('uploaded_files') or []
+    if not uploads:
+        return _document_results([], {})
+
+    semaphore = asyncio.Semaphore(WORKFLOW_CONCURRENCY)
+
+    async def bounded(func, *args):
+        async with semaphore:
+            return await asyncio.to_thread(func, *args)
+
+    kb_task = asyncio.create_task(
+        asyncio.to_thread(query_embeddings, "Required documents for death registration")
+    )
+
+    if LLM_BATCH_VERIFICATION and len(uploads) > 1:
+        docs = list(await asyncio.gather(*(bounded(_save_and_ocr, state, f) for f in uploads)))
+        kb_context = await kb_task
+        llm_decisions = await asyncio.to_thread(_verify_documents_batched, state, docs, kb_context)
+        missing = [i for i in range(len(docs)) if i not in llm_decisions]
+        verdicts = await asyncio.gather(
+            *(bounded(_verify_document_llm, state, docs[i], kb_context) for i in missing)
+        )
+        llm_decisions.update(zip(missing, verdicts))
+    else:
+        async def verify_one(file_obj):
+            doc = await bounded(_save_and_ocr, state, file_obj)
+            verdict = await bounded(_verify_document_llm, state, doc, await kb_task)
+            return doc, verdict
+
+        results = await asyncio.gather(*(verify_one(f) for f in uploads))
+        docs = [doc for doc, _ in results]
+        llm_decisions = {i: verdict for i, (_, verdict) in enumerate(results)}
+
+    return _document_results(docs, llm_decisions)
+
+async def prefetch_fraud_context(state: dict) -> dict:
+    """Fetch the fraud-check knowledge base while documents are still being verified."""
+    kb_context = await asyncio.to_thread(query_embeddings, "Fraud checks for death registration")
+    return {"fraud_kb_context": kb_context}
+
 # --------------------------
 # Build Graph
 # --------------------------
 death_graph = StateGraph(DeathRegistrationState)
-death_graph.add_node("collect_citizen_data", collect_citizen_data)
-death_graph.add_node("collect_documents", collect_documents)
-death_graph.add_node("fraud_check", fraud_check)
-death_graph.add_node("db_insert", db_insert)
-death_graph.add_node("certificate_gen", certificate_gen)
+death_graph.add_node("collect_citizen_data", traced_node("collect_citizen_data", collect_citizen_data))
+death_graph.add_node("collect_documents", traced_node("collect_documents", collect_documents))
+death_graph.add_node("fraud_check", traced_node("fraud_check", fraud_check))
+death_graph.add_node("db_insert", traced_node("db_insert", db_insert))
+death_graph.add_node("certificate_gen", traced_node("certificate_gen", certificate_gen))
 
 death_graph.add_edge(START, "collect_citizen_data")
 death_graph.add_edge("collect_citizen_data", "collect_documents")
@@ -177,11 +345,43 @@ death_graph.add_edge("certificate_gen", END)
 
 compiled_graph = death_graph.compile()
 
+# Async graph: document verification and the fraud-check lookup fan out
+# from collect_citizen_data and join again at fraud_check.
+async_death_graph = StateGraph(DeathRegistrationState)
+async_death_graph.add_node("collect_citizen_data", traced_node("collect_citizen_data", collect_citizen_data))
+async_death_graph.add_node("collect_documents", traced_node("collect_documents", acollect_documents))
+async_death_graph.add_node("prefetch_fraud_context", traced_node("prefetch_fraud_context", prefetch_fraud_context))
+async_death_graph.add_node("fraud_check", traced_node("fraud_check", fraud_check))
+async_death_graph.add_node("db_insert", traced_node("db_insert", db_insert))
+async_death_graph.add_node("certificate_gen", traced_node("certificate_gen", certificate_gen))
+
+async_death_graph.add_edge(START, "collect_citizen_data")
+async_death_graph.add_edge("collect_citizen_data", "collect_documents")
+async_death_graph.add_edge("collect_citizen_data", "prefetch_fraud_context")
+async_death_graph.add_edge(["collect_documents", "prefetch_fraud_context"], "fraud_check")
+async_death_graph.add_edge("fraud_check", "db_insert")
+async_death_graph.add_edge("db_insert", "certificate_gen")
+async_death_graph.add_edge("certificate_gen", END)
+
+compiled_async_graph = async_death_graph.compile()
+
 # --------------------------
 # Runner Function
 # --------------------------
 def run_death_registration(initial_state: dict) -> dict:
     logger.info("=== Starting Death Registration Workflow ===")
-    final_state = compiled_graph.invoke(initial_state)
-    logger.info(f"=== Workflow Finished. Final state: {final_state} ===")
+    with span("workflow.death_registration", mode="sync") as attrs:
+        final_state = compiled_graph.invoke(initial_state)
+        attrs["status"] = final_state.get('status')
+    logger.info(f"=== Workflow Finished: {final_state.get('status')} ===")
+    logger.debug("Final state: %s", StateSummary(final_state))
+    return final_state
+
+async def arun_death_registration(initial_state: dict) -> dict:
+    logger.info("=== Starting Death Registration Workflow (async) ===")
+    with span("workflow.death_registration", mode="async") as attrs:
+        final_state = await compiled_async_graph.ainvoke(initial_state)
+        attrs["status"] = final_state.get('status')
+    logger.info(f"=== Workflow Finished: {final_state.get('status')} ===")
+    logger.debug("Final state: %s", StateSummary(final_state))
     return final_state
@@ -0,0 +1,89 @@
+"""
+Bulk-import throughput benchmark.
+
+Generates a synthetic CSV or JSONL archive (about 1% malformed rows) and
+imports it into a scratch database with db/bulk_import.py, reporting
+records per second.
+
+    python benchmarks/bulk_import.py --rows 1000000 --format csv
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from db import database  # noqa: E402
+from db.bulk_import import BulkImporter  # noqa: E402
+
+FIELDS = [
+    "national_id", "full_name", "gender", "date_of_birth", "date_of_death", "place_of_death",
+    "cause_of_death", "informant_name", "informant_id_number", "relation", "certificate_number",
+]
+PLACES = ["Addis Ababa Hospital", "Health Center Bole", "Home", "Clinic", "Street"]
+CAUSES = ["Natural Causes", "Accident", "Illness", "Unknown"]
+
+
+def synthetic_rows(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    for i in range(n):
+        birth_year = rng.randint(1920, 2000)
+        row = {
+            "national_id": f"{i:010d}",
+            "full_name": f"Citizen {i}",
+            "gender": rng.choice(["Male", "Female"]),
+            "date_of_birth": f"{birth_year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "date_of_death": f"{rng.randint(birth_year + 1, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "place_of_death": rng.choice(PLACES),
+            "cause_of_death": rng.choice(CAUSES),
+            "informant_name": f"Informant {i // 3}",
+            "informant_id_number": f"I{i // 3:09d}",
+            "relation": rng.choice(["Spouse", "Child", "Sibling", "Parent"]),
+            "certificate_number": f"DC-H-{i:08d}",
+        }
+        if rng.random() < 0.01:
+            row["date_of_death"] = "not-a-date"
+        yield row
+
+
+def write_archive(path: str, rows: int, fmt: str):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(synthetic_rows(rows))
+        else:
+            for row in synthetic_rows(rows):
+                f.write(json.dumps(row) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    archive = os.path.join(workdir, f"archive.{args.format}")
+    start = time.perf_counter()
+    write_archive(archive, args.rows, args.format)
+    print(f"generated {args.rows:,} rows in {time.perf_counter() - start:.1f}s ({archive})")
+
+    database.DB_PATH = os.path.join(workdir, "bench.db")
+    importer = BulkImporter(chunk_size=args.chunk_size, rejects_path=os.path.join(workdir, "rejects.jsonl"))
+    stats = importer.import_file(archive, fmt=args.format)
+
+    count = sqlite3.connect(database.DB_PATH).execute("SELECT COUNT(*) FROM death_records").fetchone()[0]
+    print(f"imported {stats['imported']:,} records, rejected {stats['rejected']:,} ({count:,} rows in death_records)")
+    print(f"elapsed {stats['seconds']:.1f}s — {stats['rows_per_second']:,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
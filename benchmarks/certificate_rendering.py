@@ -0,0 +1,95 @@
+"""
+Certificate rendering throughput benchmark.
+
+Renders the same synthetic death records with the original per-label
+canvas drawing, agents/death/certificates.py one file at a time and in
+bulk across a process pool, and as a single multi-page archive that shares
+one form XObject, reporting certificates per second for each.
+
+    python benchmarks/certificate_rendering.py --records 2000 --workers 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from reportlab.lib.pagesizes import A4  # noqa: E402
+from reportlab.pdfgen import canvas  # noqa: E402
+from agents.death.certificates import render_certificate, render_bulk, certificate_number_for  # noqa: E402
+
+
+def synthetic_records(n: int):
+    return [
+        {
+            "record_id": i,
+            "full_name": f"Citizen {i}",
+            "national_id": f"{i:010d}",
+            "date_of_death": "2024-03-01",
+            "place_of_death": "Addis Ababa Hospital",
+            "cause_of_death": "Natural Causes",
+            "informant_name": f"Informant {i}",
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+def legacy_render(death_record, output_dir):
+    """The original tools.generate_certificate drawing, kept for comparison."""
+    certificate_number = certificate_number_for(death_record['record_id'])
+    file_path = os.path.join(output_dir, f"{certificate_number}.pdf")
+    c = canvas.Canvas(file_path, pagesize=A4)
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(100, 800, "Death Certificate")
+    c.setFont("Helvetica", 12)
+    c.drawString(100, 770, f"Certificate Number: {certificate_number}")
+    c.drawString(100, 750, f"Full Name: {death_record['full_name']}")
+    c.drawString(100, 730, f"National ID: {death_record['national_id']}")
+    c.drawString(100, 710, f"Date of Death: {death_record['date_of_death']}")
+    c.drawString(100, 690, f"Place of Death: {death_record['place_of_death']}")
+    c.drawString(100, 670, f"Cause of Death: {death_record['cause_of_death']}")
+    c.drawString(100, 650, f"Informant: {death_record['informant_name']}")
+    c.drawString(100, 630, f"Date Registered: {datetime.now().strftime('%Y-%m-%d')}")
+    c.showPage()
+    c.save()
+    return file_path, certificate_number
+
+
+def timed(label, count, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {count:>7,} certs in {elapsed:6.2f}s — {count / elapsed:8,.0f} certs/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    records = synthetic_records(args.records)
+    workdir = tempfile.mkdtemp()
+
+    def run_in(name):
+        path = os.path.join(workdir, name)
+        os.makedirs(path)
+        return path
+
+    legacy_dir = run_in("legacy")
+    timed("legacy canvas", len(records), lambda: [legacy_render(r, legacy_dir) for r in records])
+    template_dir = run_in("template")
+    timed("one file each, 1 process", len(records), lambda: [render_certificate(r, template_dir) for r in records])
+    bulk_dir = run_in("bulk")
+    timed(f"one file each, {args.workers} processes", len(records),
+          lambda: render_bulk(records, output_dir=bulk_dir, workers=args.workers))
+    archive = os.path.join(workdir, "archive.pdf")
+    timed("archive (shared XObject)", len(records), lambda: render_bulk(records, archive_path=archive))
+    print(f"archive size {os.path.getsize(archive) / 1024:,.0f} KB ({workdir})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Concurrency benchmark for db/database.py.
+
+Runs N threads (one per simulated Streamlit session), each performing a
+series of death registrations (citizen + informant + death record) against
+a scratch database, and reports throughput and lock-wait errors.
+
+    python benchmarks/db_concurrency.py --threads 8 --registrations 200
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from db import database, init_db  # noqa: E402
+
+
+def worker(worker_id: int, registrations: int, errors: list, latencies: list):
+    for i in range(registrations):
+        national_id = f"{worker_id:04d}{i:08d}"
+        start = time.perf_counter()
+        try:
+            citizen_id = database.add_citizen(f"Citizen {national_id}", national_id, "Female", "1950-01-01")
+            informant_id = database.add_informant(f"Informant {national_id}", f"I{national_id}", "Child")
+            database.add_death_record(citizen_id, "2025-01-01", "Addis Ababa", "Natural Causes", informant_id, None)
+        except sqlite3.OperationalError as e:
+            errors.append(str(e))
+            continue
+        latencies.append(time.perf_counter() - start)
+    database.close_connection()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--registrations", type=int, default=200, help="registrations per thread")
+    parser.add_argument("--db", help="database file (default: a temporary file)")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(), "bench.db")
+    database.DB_PATH = db_path
+    init_db.init_db()
+
+    errors, latencies = [], []
+    threads = [
+        threading.Thread(target=worker, args=(n, args.registrations, errors, latencies))
+        for n in range(args.threads)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    journal = sqlite3.connect(db_path).execute("PRAGMA journal_mode").fetchone()[0]
+    print(f"database: {db_path} (journal_mode={journal})")
+    print(f"threads={args.threads} registrations={len(latencies)} elapsed={elapsed:.2f}s")
+    print(f"throughput: {len(latencies) / elapsed:.1f} registrations/s")
+    if latencies:
+        print(
+            f"latency: p50={latencies[len(latencies) // 2] * 1000:.1f}ms "
+            f"p95={latencies[int(len(latencies) * 0.95)] * 1000:.1f}ms "
+            f"max={latencies[-1] * 1000:.1f}ms"
+        )
+    print(f"lock-wait errors: {len(errors)}")
+    for message in sorted(set(errors))[:5]:
+        print(f"  {message}")
+
+
+if __name__ == "__main__":
+    main()
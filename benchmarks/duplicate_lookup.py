@@ -0,0 +1,84 @@
+"""
+Duplicate-death lookup benchmark: indexed (migrated) schema vs. the legacy
+unindexed death_records table.
+
+Fills both with the same synthetic rows, then times the query used by
+check_duplicate_death for a mix of hits and misses.
+
+    python benchmarks/duplicate_lookup.py --rows 2000000 --lookups 2000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from db.migrations import migrate  # noqa: E402
+
+LEGACY_TABLE = """
+CREATE TABLE death_records (
+    record_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    citizen_id INTEGER,
+    date_of_death DATE,
+    place TEXT,
+    cause_of_death TEXT,
+    informant_id INTEGER,
+    certificate_number TEXT
+)
+"""
+
+
+def fill(conn, rows: int, place_column: str):
+    conn.execute("BEGIN")
+    conn.executemany(
+        f"INSERT INTO death_records (citizen_id, date_of_death, {place_column}, cause_of_death, informant_id) "
+        "VALUES (?, '2020-01-01', 'Addis Ababa', 'Natural Causes', ?)",
+        ((citizen_id, citizen_id) for citizen_id in range(1, rows + 1)),
+    )
+    conn.commit()
+
+
+def time_lookups(conn, citizen_ids) -> float:
+    start = time.perf_counter()
+    for citizen_id in citizen_ids:
+        conn.execute("SELECT record_id FROM death_records WHERE citizen_id = ?", (citizen_id,)).fetchone()
+    return (time.perf_counter() - start) / len(citizen_ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--lookups", type=int, default=2000, help="lookups against the indexed table")
+    parser.add_argument("--legacy-lookups", type=int, default=20, help="lookups against the unindexed table")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    rng = random.Random(0)
+
+    indexed = sqlite3.connect(os.path.join(workdir, "indexed.db"), isolation_level=None)
+    migrate(indexed)
+    legacy = sqlite3.connect(os.path.join(workdir, "legacy.db"), isolation_level=None)
+    legacy.execute(LEGACY_TABLE)
+
+    for name, conn, place_column in (("indexed", indexed, "place_of_death"), ("legacy", legacy, "place")):
+        start = time.perf_counter()
+        fill(conn, args.rows, place_column)
+        print(f"{name}: inserted {args.rows:,} rows in {time.perf_counter() - start:.1f}s")
+
+    # Half existing citizens (duplicates), half unknown ones
+    def sample(n):
+        return [rng.randint(1, args.rows) if i % 2 else args.rows + rng.randint(1, args.rows) for i in range(n)]
+
+    indexed_avg = time_lookups(indexed, sample(args.lookups))
+    legacy_avg = time_lookups(legacy, sample(args.legacy_lookups))
+    print(f"indexed: {indexed_avg * 1e6:,.1f} µs/lookup over {args.lookups} lookups")
+    print(f"legacy:  {legacy_avg * 1e6:,.1f} µs/lookup over {args.legacy_lookups} lookups")
+    print(f"speed-up: {legacy_avg / indexed_avg:,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Knowledge-base retrieval quality: embedding backends and retrieval modes compared.
+
+Builds a scratch FAISS + BM25 index of the rules knowledge base with each
+embedding backend and asks a fixed set of questions in each retrieval
+mode. A question counts as answered at rank r when the r-th retrieved
+chunk contains its expected rules key. Reports hit@1, hit@k, MRR and mean
+query latency per backend and mode. The remote "google" backend is
+skipped when GOOGLE_API_KEY is not set.
+
+    python benchmarks/retrieval_quality.py --backends hashing google --modes vector bm25 hybrid auto --k 3
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agents.death import embeddings  # noqa: E402
+
+# (question, rules key the answering chunk must contain)
+QUESTIONS = [
+    ("Required documents for death registration", "required_documents"),
+    ("Fraud checks for death registration", "fraud_checks"),
+    ("Which documents are needed to register a death?", "required_documents"),
+    ("What proof is needed when a death is registered late?", "Written proof"),
+    ("How is the unique registration ID composed?", "unique_id"),
+    ("Which article assigns the registration office code?", "office_code"),
+    ("What does Art. 85 say about the form number?", "form_number"),
+    ("How is the age of a baby younger than one month recorded?", "if_under_1_month"),
+    ("What evidence supports the cause of death?", "evidence_type"),
+    ("Where was the deceased buried?", "burial_place"),
+    ("What is the informant's relation to the deceased?", "relation_to_deceased"),
+    ("Was the death related to pregnancy or childbirth?", "maternal_related"),
+    ("Which statuses can a registration have?", "workflow.status"),
+    ("How do you say death certificate in Amharic?", "translations.amharic"),
+    ("What types of place of death are accepted?", "place_of_death.type"),
+    ("What marital status values are allowed for the deceased?", "marital_status"),
+]
+
+
+def build(backend: str):
+    """Scratch index built with `backend`; returns (retriever, build seconds)."""
+    embeddings._embeddings = embeddings.create_embeddings(backend)
+    index_path = os.path.join(tempfile.mkdtemp(), f"{backend}.index")
+    start = time.perf_counter()
+    embeddings.build_index(index_path, force=True)
+    build_seconds = time.perf_counter() - start
+
+    retriever = embeddings.KnowledgeBaseRetriever(index_path)
+    retriever.get_store()
+    retriever.get_bm25()
+    return retriever, build_seconds
+
+
+def evaluate(retriever, mode: str, k: int) -> dict:
+    hits_at_1 = hits_at_k = reciprocal_ranks = 0.0
+    latencies = []
+    misses = []
+    for question, expected in QUESTIONS:
+        start = time.perf_counter()
+        results = retriever.search(question, k=k, service="death", mode=embeddings.resolve_mode(question, mode))
+        latencies.append(time.perf_counter() - start)
+        rank = next((i for i, text in enumerate(results, start=1) if expected in text), None)
+        if rank is None:
+            misses.append(question)
+            continue
+        hits_at_1 += rank == 1
+        hits_at_k += 1
+        reciprocal_ranks += 1 / rank
+
+    n = len(QUESTIONS)
+    return {
+        "hit@1": hits_at_1 / n,
+        f"hit@{k}": hits_at_k / n,
+        "mrr": reciprocal_ranks / n,
+        "query_ms": sum(latencies) / n * 1000,
+        "misses": misses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=list(embeddings.EMBEDDING_BACKENDS))
+    parser.add_argument("--modes", nargs="+", default=list(embeddings.RETRIEVAL_MODES),
+                        choices=embeddings.RETRIEVAL_MODES)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--show-misses", action="store_true")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    print(f"{len(QUESTIONS)} questions, k={args.k}\n")
+    print(f"{'backend':<10} {'mode':<8} {'hit@1':>7} {f'hit@{args.k}':>7} {'MRR':>7} {'query ms':>10}")
+    for backend in args.backends:
+        if backend == "google" and not embeddings.GOOGLE_API_KEY:
+            print(f"{backend:<10} skipped (GOOGLE_API_KEY not set)")
+            continue
+        retriever, build_seconds = build(backend)
+        for mode in args.modes:
+            result = evaluate(retriever, mode, args.k)
+            print(f"{backend:<10} {mode:<8} {result['hit@1']:>7.2f} {result[f'hit@{args.k}']:>7.2f} "
+                  f"{result['mrr']:>7.2f} {result['query_ms']:>10.2f}")
+            if args.show_misses:
+                for question in result["misses"]:
+                    print(f"    missed: {question}")
+        print(f"{backend:<10} index built in {build_seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Startup-time benchmark: how long does a fresh interpreter take to `import app`?
+
+Each run spawns a new Python process so nothing is shared between samples.
+Pass several --repo paths to compare trees, e.g. before/after a change:
+
+    git worktree add /tmp/vcs-before <old-commit>
+    python benchmarks/startup_time.py --repo . --repo /tmp/vcs-before
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def time_import(repo: str, module: str) -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", f"import {module}"],
+        cwd=repo,
+        env={**os.environ, "PYTHONPATH": repo, "PYTHONDONTWRITEBYTECODE": "1"},
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repo", action="append", help="repository root to measure (repeatable)")
+    parser.add_argument("--module", default="app", help="module to import (default: app)")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    for repo in args.repo or [REPO_ROOT]:
+        repo = os.path.abspath(repo)
+        time_import(repo, args.module)  # warm the OS file cache
+        samples = [time_import(repo, args.module) for _ in range(args.runs)]
+        print(
+            f"{repo}: import {args.module} "
+            f"median={statistics.median(samples) * 1000:.0f}ms "
+            f"min={min(samples) * 1000:.0f}ms max={max(samples) * 1000:.0f}ms "
+            f"(runs={args.runs})"
+        )
+
+
+if __name__ == "__main__":
+    main()
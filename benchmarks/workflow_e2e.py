@@ -0,0 +1,291 @@
+"""
+Offline end-to-end benchmark of the death-registration workflow.
+
+Runs run_death_registration (or the async graph) over synthetic
+applications with every external dependency replaced by a local stand-in:
+
+  * Groq      -> a stub chat-completions HTTP server on 127.0.0.1
+  * Google    -> a deterministic fake embedding model (hash-seeded vectors)
+  * Tesseract -> replayed OCR text with injected per-page latency
+
+Each stand-in has a configurable latency, so the numbers track the
+workflow's own overhead plus whatever service latency you model. Reports
+per-stage latency percentiles (from agents/death/tracing.py spans) and
+applications per second. No network access or API keys are needed.
+
+    python benchmarks/workflow_e2e.py --applications 200 --concurrency 8
+    python benchmarks/workflow_e2e.py --mode async --llm-latency-ms 300 --ocr-latency-ms 150
+"""
+import argparse
+import asyncio
+import hashlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+
+# --------------------------
+# Stub chat-completions server
+# --------------------------
+class StubLLMHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        prompt = body["messages"][0]["content"]
+        time.sleep(self.latency)
+        if "JSON object" in prompt:
+            documents = prompt.count("(OCR verified:")
+            content = json.dumps({str(i): True for i in range(1, documents + 1)})
+        elif "fraud detection" in prompt:
+            content = "approved"
+        else:
+            content = "True"
+        payload = json.dumps({
+            "id": "stub",
+            "object": "chat.completion",
+            "model": body.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_llm(latency: float) -> ThreadingHTTPServer:
+    handler = type("Handler", (StubLLMHandler,), {"latency": latency})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# --------------------------
+# Fake embedding model
+# --------------------------
+def fake_embedding_model(dimensions: int, latency: float):
+    import numpy as np
+    from langchain_core.embeddings import Embeddings
+
+    class FakeEmbeddings(Embeddings):
+        """Same text -> same unit vector; no network."""
+
+        def _embed(self, text):
+            seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+            vector = np.random.default_rng(seed).standard_normal(dimensions)
+            return (vector / np.linalg.norm(vector)).tolist()
+
+        def embed_documents(self, texts):
+            return [self._embed(text) for text in texts]
+
+        def embed_query(self, text):
+            time.sleep(latency)  # one remote round trip per query
+            return self._embed(text)
+
+    return FakeEmbeddings()
+
+
+# --------------------------
+# Replayed OCR
+# --------------------------
+def replay_ocr(pages: int, latency: float):
+    """
+    Stand-in for ocr_utils.iter_page_texts: yields `pages` pages of canned
+    text after `latency` seconds each. Synthetic uploads are small JSON
+    files; the national ID they carry is replayed on the last page, so
+    keyword matching scans every page.
+    """
+    from agents.death.tracing import span
+
+    def iter_page_texts(file_path, lang="eng", dpi=None, file_hash=None):
+        with open(file_path, "rb") as f:
+            national_id = json.loads(f.read().decode("utf-8"))["national_id"]
+        for page in range(1, pages + 1):
+            with span("ocr.page", page=page, replayed=True):
+                time.sleep(latency)
+            text = f"Federal Democratic Republic of Ethiopia - page {page}\n"
+            yield text + (f"National ID: {national_id}\n" if page == pages else "")
+
+    return iter_page_texts
+
+
+# --------------------------
+# Synthetic applications
+# --------------------------
+def synthetic_applications(n: int, documents: int, store, late_fraction: float,
+                           duplicate_fraction: float, seed: int = 0):
+    rng = random.Random(seed)
+    today = date.today()
+    applications = []
+    for i in range(n):
+        if applications and rng.random() < duplicate_fraction:
+            national_id = rng.choice(applications)["national_id"]  # resubmission of a known death
+        else:
+            national_id = f"{i:010d}"
+        late = rng.random() < late_fraction
+        uploads = []
+        for d in range(documents):
+            upload = io.BytesIO(json.dumps({"national_id": national_id, "application": i, "document": d}).encode())
+            upload.name = f"document_{d}.pdf"
+            uploads.append(upload)
+        applications.append({
+            "full_name": f"Citizen {i}",
+            "national_id": national_id,
+            "gender": rng.choice(["Male", "Female"]),
+            "dob": date(rng.randint(1930, 2000), rng.randint(1, 12), rng.randint(1, 28)).isoformat(),
+            "date_of_death": (today - timedelta(days=rng.randint(60, 400) if late else rng.randint(0, 20))).isoformat(),
+            "place_of_death": "Addis Ababa Hospital",
+            "cause_of_death": "Natural Causes",
+            "informant_name": f"Informant {i}",
+            "informant_id": f"I{i:09d}",
+            "relation": "Child",
+            "uploaded_files": store.save_all(uploads),
+        })
+    return applications
+
+
+# --------------------------
+# Harness
+# --------------------------
+def configure(args, workdir):
+    """Point every dependency at a local stand-in; must run before importing the workflow."""
+    server = start_stub_llm(args.llm_latency_ms / 1000)
+    os.environ.update({
+        "GROQ_API_URL": f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions",
+        "GROQ_API_KEY": "offline-benchmark",
+        "LLM_CACHE_DB": os.path.join(workdir, "llm.sqlite") if args.llm_cache else "",
+        "KB_CACHE_DB": "",
+        "OCR_CACHE_DB": "",
+        "TRACE_LOG_PATH": os.path.join(workdir, "traces.jsonl"),
+    })
+
+    from db import database
+    from agents.death import embeddings, tools, workflow
+    from agents.death.certificates import render_certificate
+
+    database.DB_PATH = os.path.join(workdir, "bench.db")
+    database.init_db()
+
+    if args.embedding_backend == "fake":
+        embeddings._embeddings = fake_embedding_model(args.embedding_dimensions, args.embedding_latency_ms / 1000)
+    else:
+        embeddings._embeddings = embeddings.create_embeddings(args.embedding_backend)
+    index_path = os.path.join(workdir, "kb.index")
+    embeddings.build_index(index_path, force=True)
+    embeddings._retriever = embeddings.KnowledgeBaseRetriever(index_path)
+
+    tools.iter_page_texts = replay_ocr(args.pages, args.ocr_latency_ms / 1000)
+    certificates_dir = os.path.join(workdir, "certificates")
+    workflow.generate_certificate = lambda record: render_certificate(record, certificates_dir)
+    return server
+
+
+def run(applications, mode: str, concurrency: int):
+    from agents.death.workflow import run_death_registration, arun_death_registration
+
+    if mode == "async":
+        async def run_all():
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def one(application):
+                async with semaphore:
+                    return await arun_death_registration(dict(application))
+
+            return await asyncio.gather(*(one(a) for a in applications))
+
+        return asyncio.run(run_all())
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(lambda a: run_death_registration(dict(a)), applications))
+
+
+def report(results, elapsed, summary, output=None):
+    statuses = {}
+    for state in results:
+        statuses[state.get("status")] = statuses.get(state.get("status"), 0) + 1
+    print(f"\n{len(results):,} applications in {elapsed:.2f}s — {len(results) / elapsed:,.1f} applications/s")
+    print("outcomes: " + ", ".join(f"{status}={count}" for status, count in sorted(statuses.items(), key=str)))
+
+    print(f"\n{'stage':<36} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'apps/s':>9}")
+    for name, stats in summary.items():
+        # Serial capacity of the stage: calls per second back to back at the mean latency
+        rate = 1000 / stats["mean_ms"] if stats["mean_ms"] else float("inf")
+        print(f"{name:<36} {stats['count']:>7} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} "
+              f"{stats['p99_ms']:>9.1f} {rate:>9,.0f}")
+
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump({
+                "applications": len(results),
+                "seconds": elapsed,
+                "applications_per_second": len(results) / elapsed,
+                "outcomes": statuses,
+                "stages": summary,
+            }, f, indent=2, default=str)
+        print(f"\nwrote {output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--applications", type=int, default=100)
+    parser.add_argument("--documents", type=int, default=3,
+                        help="uploads per application (fewer than the 3 unconditional required documents escalates)")
+    parser.add_argument("--pages", type=int, default=2, help="OCR pages per upload")
+    parser.add_argument("--mode", choices=["sync", "async"], default="sync")
+    parser.add_argument("--concurrency", type=int, default=4, help="applications in flight at once")
+    parser.add_argument("--llm-latency-ms", type=float, default=50)
+    parser.add_argument("--embedding-backend", choices=["fake", "hashing"], default="fake",
+                        help="fake remote model (with --embedding-latency-ms) or the local hashing backend")
+    parser.add_argument("--embedding-latency-ms", type=float, default=30)
+    parser.add_argument("--embedding-dimensions", type=int, default=256)
+    parser.add_argument("--ocr-latency-ms", type=float, default=40, help="per page")
+    parser.add_argument("--late-fraction", type=float, default=0.2,
+                        help="share of late registrations (escalated to the LLM)")
+    parser.add_argument("--duplicate-fraction", type=float, default=0.05,
+                        help="share of resubmissions of an already registered death")
+    parser.add_argument("--llm-cache", action="store_true", help="enable the LLM response cache")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the results as JSON")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+
+    workdir = tempfile.mkdtemp(prefix="death-e2e-")
+    server = configure(args, workdir)
+
+    from agents.death.tracing import get_tracer
+    from agents.death.uploads import UploadStore
+
+    store = UploadStore(os.path.join(workdir, "documents"))
+    applications = synthetic_applications(args.applications, args.documents, store,
+                                          args.late_fraction, args.duplicate_fraction, args.seed)
+    get_tracer().reset()  # drop spans from the index build
+
+    start = time.perf_counter()
+    results = run(applications, args.mode, args.concurrency)
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    report(results, elapsed, get_tracer().summary(), args.output)
+    print(f"spans: {os.environ['TRACE_LOG_PATH']}")
+
+
+if __name__ == "__main__":
+    main()
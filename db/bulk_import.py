@@ -0,0 +1,268 @@
+import csv
+import json
+import os
+import queue
+import threading
+import time
+from datetime import date, datetime
+from itertools import islice
+from db.database import get_connection, DB_PATH
+from db.migrations import migrate
+
+# --------------------------
+# Bulk import of historical death records
+# --------------------------
+# Streams a CSV or JSONL file in chunks. Each chunk is validated in Python
+# against in-memory national_id / id_number maps, written with executemany
+# and committed in one transaction together with the file's checkpoint, so
+# an interrupted import resumes after the last committed chunk. Rows that
+# fail validation go to a rejects file (JSONL) instead of aborting the run.
+# Parsing and validation of the next chunk run on a background thread while
+# SQLite (which releases the GIL) writes the current one.
+#
+# Ids are assigned from the in-memory maps, so run imports while the app is
+# not registering deaths; a conflicting write aborts the chunk and the
+# import can simply be re-run to resume.
+#
+# Expected columns: national_id, full_name, date_of_death (required) and
+# gender, date_of_birth, place_of_death, cause_of_death, informant_name,
+# informant_id_number, relation, certificate_number (optional).
+
+REQUIRED_FIELDS = ("national_id", "full_name", "date_of_death")
+DEFAULT_CHUNK_SIZE = 50_000
+
+
+def read_rows(path, fmt=None):
+    """Yield dict rows from a CSV or JSONL file, streaming."""
+    fmt = fmt or ("jsonl" if path.lower().endswith((".jsonl", ".ndjson")) else "csv")
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            reader = csv.reader(f)
+            header = [name.strip() for name in next(reader, [])]
+            for values in reader:
+                if values:
+                    yield dict(zip(header, values))
+        else:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield {"_parse_error": str(e), "_raw": line}
+
+
+def _field(row, name):
+    value = row.get(name)
+    if value is None:
+        return None
+    if value.__class__ is not str:
+        value = str(value)
+    return value.strip() or None
+
+
+def _parse_date(value, field):
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value[:10]).isoformat()
+    except ValueError:
+        raise ValueError(f"invalid {field} '{value}' (expected YYYY-MM-DD)")
+
+
+class BulkImporter:
+    def __init__(self, conn=None, chunk_size=DEFAULT_CHUNK_SIZE, rejects_path=None):
+        self.conn = conn or get_connection()
+        self.chunk_size = chunk_size
+        self.rejects_path = rejects_path
+        migrate(self.conn)
+        self._load_maps()
+
+    def _load_maps(self):
+        """Warm the national_id / id_number maps and the set of deceased citizens."""
+        cur = self.conn.cursor()
+        self.citizens = dict(cur.execute("SELECT national_id, citizen_id FROM citizens WHERE national_id IS NOT NULL"))
+        self.informants = dict(cur.execute("SELECT id_number, informant_id FROM informants WHERE id_number IS NOT NULL"))
+        self.deceased = {row[0] for row in cur.execute("SELECT citizen_id FROM death_records")}
+        self.certificates = {row[0] for row in cur.execute(
+            "SELECT certificate_number FROM death_records WHERE certificate_number IS NOT NULL")}
+        self.next_citizen_id = (cur.execute("SELECT MAX(citizen_id) FROM citizens").fetchone()[0] or 0) + 1
+        self.next_informant_id = (cur.execute("SELECT MAX(informant_id) FROM informants").fetchone()[0] or 0) + 1
+
+    def _prepare_chunk(self, rows, first_row):
+        """
+        Validate rows and turn them into insert tuples; returns
+        (new citizens, citizens to mark deceased, informants, records, rejects).
+        """
+        new_citizens, existing_citizens, new_informants, records, rejects = [], [], [], [], []
+        citizens, informants, deceased, certificates = self.citizens, self.informants, self.deceased, self.certificates
+        for row_number, raw in enumerate(rows, start=first_row):
+            try:
+                if not isinstance(raw, dict):
+                    raise ValueError("row is not a JSON object")
+                if "_parse_error" in raw:
+                    raise ValueError(f"unparseable line: {raw['_parse_error']}")
+                national_id = _field(raw, "national_id")
+                full_name = _field(raw, "full_name")
+                date_of_death = _field(raw, "date_of_death")
+                missing = [name for name, value in zip(REQUIRED_FIELDS, (national_id, full_name, date_of_death)) if not value]
+                if missing:
+                    raise ValueError(f"missing {', '.join(missing)}")
+                date_of_birth = _parse_date(_field(raw, "date_of_birth") or _field(raw, "dob"), "date_of_birth")
+                date_of_death = _parse_date(date_of_death, "date_of_death")
+                if date_of_birth and date_of_death < date_of_birth:
+                    raise ValueError("date_of_death before date_of_birth")
+
+                citizen_id = citizens.get(national_id)
+                if citizen_id in deceased:
+                    raise ValueError("duplicate death record for national_id")
+                certificate_number = _field(raw, "certificate_number")
+                if certificate_number and certificate_number in certificates:
+                    raise ValueError("duplicate certificate_number")
+            except ValueError as e:
+                rejects.append({"row": row_number, "reason": str(e), "data": raw})
+                continue
+
+            if citizen_id is None:
+                citizen_id = self.next_citizen_id
+                self.next_citizen_id += 1
+                citizens[national_id] = citizen_id
+                new_citizens.append((citizen_id, full_name, national_id, _field(raw, "gender"), date_of_birth, "deceased"))
+            else:
+                existing_citizens.append(("deceased", citizen_id))
+
+            informant_id = None
+            id_number = _field(raw, "informant_id_number")
+            if id_number:
+                informant_id = informants.get(id_number)
+                if informant_id is None:
+                    informant_id = self.next_informant_id
+                    self.next_informant_id += 1
+                    informants[id_number] = informant_id
+                    new_informants.append((informant_id, _field(raw, "informant_name"), id_number, _field(raw, "relation")))
+
+            deceased.add(citizen_id)
+            if certificate_number:
+                certificates.add(certificate_number)
+            records.append((citizen_id, date_of_death, _field(raw, "place_of_death"), _field(raw, "cause_of_death"),
+                            informant_id, certificate_number, "registered"))
+        return new_citizens, existing_citizens, new_informants, records, rejects
+
+    def _write_rejects(self, rejects):
+        if not rejects or not self.rejects_path:
+            return
+        with open(self.rejects_path, "a", encoding="utf-8") as f:
+            for reject in rejects:
+                f.write(json.dumps(reject, ensure_ascii=False, default=str) + "\n")
+
+    def import_file(self, path, fmt=None, progress=None):
+        """
+        Import `path`, resuming after the last committed chunk. Returns a
+        summary dict with imported / rejected / skipped row counts and rate.
+        """
+        source = os.path.abspath(path)
+        cur = self.conn.cursor()
+        row = cur.execute("SELECT rows_done FROM import_checkpoints WHERE source=?", (source,)).fetchone()
+        rows_done = row[0] if row else 0
+
+        stats = {"imported": 0, "rejected": 0, "skipped": rows_done}
+        start = time.perf_counter()
+        chunks = queue.Queue(maxsize=2)
+        stop = threading.Event()
+
+        def produce():
+            try:
+                rows = read_rows(path, fmt)
+                # Skip rows committed by a previous run
+                for _ in islice(rows, rows_done):
+                    pass
+                done = rows_done
+                while not stop.is_set():
+                    chunk = list(islice(rows, self.chunk_size))
+                    if not chunk:
+                        break
+                    prepared = self._prepare_chunk(chunk, done + 1)
+                    done += len(chunk)
+                    chunks.put((done, prepared))
+                chunks.put(None)
+            except BaseException as e:
+                chunks.put(e)
+
+        producer = threading.Thread(target=produce, name="bulk-import-reader", daemon=True)
+        producer.start()
+        try:
+            while True:
+                item = chunks.get()
+                if item is None:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                rows_done, (citizens, deceased, informants, records, rejects) = item
+                try:
+                    cur.execute("BEGIN IMMEDIATE")
+                    cur.executemany(
+                        "INSERT INTO citizens (citizen_id, full_name, national_id, gender, date_of_birth, status) "
+                        "VALUES (?, ?, ?, ?, ?, ?)", citizens)
+                    cur.executemany("UPDATE citizens SET status=? WHERE citizen_id=?", deceased)
+                    cur.executemany(
+                        "INSERT INTO informants (informant_id, full_name, id_number, relation_to_deceased) "
+                        "VALUES (?, ?, ?, ?)", informants)
+                    cur.executemany(
+                        "INSERT INTO death_records (citizen_id, date_of_death, place_of_death, cause_of_death, "
+                        "informant_id, certificate_number, status) VALUES (?, ?, ?, ?, ?, ?, ?)", records)
+                    cur.execute(
+                        "INSERT OR REPLACE INTO import_checkpoints (source, rows_done, updated_at) VALUES (?, ?, ?)",
+                        (source, rows_done, datetime.now().isoformat(timespec="seconds")))
+                    self.conn.commit()
+                except BaseException:
+                    self.conn.rollback()
+                    raise
+                self._write_rejects(rejects)
+
+                stats["imported"] += len(records)
+                stats["rejected"] += len(rejects)
+                if progress:
+                    progress(rows_done, stats)
+        except BaseException:
+            stop.set()
+            # Unblock the reader so it can observe `stop`, then drop the
+            # ids it reserved for chunks that were never written.
+            while producer.is_alive():
+                try:
+                    chunks.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            self._load_maps()
+            raise
+
+        elapsed = time.perf_counter() - start
+        stats["seconds"] = elapsed
+        stats["rows_per_second"] = (stats["imported"] + stats["rejected"]) / elapsed if elapsed else 0.0
+        return stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Bulk-import historical death records from CSV or JSONL.")
+    parser.add_argument("path", help="CSV or JSONL file")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="input format (default: from extension)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows per transaction")
+    parser.add_argument("--rejects", help="where to write rejected rows (default: <path>.rejects.jsonl)")
+    args = parser.parse_args()
+
+    importer = BulkImporter(
+        chunk_size=args.chunk_size,
+        rejects_path=args.rejects or f"{args.path}.rejects.jsonl",
+    )
+    stats = importer.import_file(
+        args.path,
+        fmt=args.format,
+        progress=lambda done, s: print(f"  {done:,} rows processed ({s['imported']:,} imported, {s['rejected']:,} rejected)"),
+    )
+    print(
+        f"Imported {stats['imported']:,} records into {DB_PATH} "
+        f"({stats['rejected']:,} rejected, {stats['skipped']:,} already imported) "
+        f"in {stats['seconds']:.1f}s — {stats['rows_per_second']:,.0f} rows/s"
+    )
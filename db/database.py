@@ -1,51 +1,72 @@
 import sqlite3
 import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
 
 DB_PATH = os.path.join(os.path.dirname(__file__), "civil_service.db")
 
+# Tuned for many short transactions from concurrent Streamlit sessions
+PRAGMAS = {
+    "journal_mode": "WAL",     # readers don't block the writer
+    "synchronous": "NORMAL",   # safe with WAL; fsync at checkpoints only
+    "cache_size": -20000,      # ~20 MB page cache per connection
+    "busy_timeout": 5000,      # wait up to 5 s for a lock instead of failing
+    "temp_store": "MEMORY",
+}
+
+# --------------------------
+# Connection management
+# --------------------------
+_local = threading.local()
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=PRAGMAS["busy_timeout"] / 1000)
+    for name, value in PRAGMAS.items():
+        conn.execute(f"PRAGMA {name}={value}")
+    return conn
+
 def get_connection():
-    return sqlite3.connect(DB_PATH)
+    """
+    Return this thread's connection to DB_PATH, opening it on first use.
 
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
+    Connections are reused for the life of the thread, so callers must not
+    close them; use close_connection() when a thread is done with the DB.
+    """
+    key = (os.getpid(), DB_PATH)
+    conn = getattr(_local, "connections", {}).get(key)
+    if conn is None:
+        conn = _connect(DB_PATH)
+        if not hasattr(_local, "connections"):
+            _local.connections = {}
+        _local.connections[key] = conn
+    return conn
 
-    # Citizens table
-    c.execute('''
-    CREATE TABLE IF NOT EXISTS citizens (
-        citizen_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        full_name TEXT,
-        national_id TEXT UNIQUE,
-        gender TEXT,
-        dob DATE
-    )
-    ''')
-
-    # Informants table
-    c.execute('''
-    CREATE TABLE IF NOT EXISTS informants (
-        informant_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        full_name TEXT,
-        id_number TEXT,
-        relation TEXT
-    )
-    ''')
-
-    # Death records table
-    c.execute('''
-    CREATE TABLE IF NOT EXISTS death_records (
-        record_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        citizen_id INTEGER,
-        date_of_death DATE,
-        place TEXT,
-        cause_of_death TEXT,
-        informant_id INTEGER,
-        certificate_number TEXT
-    )
-    ''')
+def close_connection():
+    """Close the calling thread's connections."""
+    for conn in getattr(_local, "connections", {}).values():
+        conn.close()
+    _local.connections = {}
 
-    conn.commit()
-    conn.close()
+@contextmanager
+def transaction():
+    """
+    Run the enclosed statements as one transaction on this thread's
+    connection: committed once on success, rolled back on any error.
+    """
+    conn = get_connection()
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+
+def init_db():
+    """Create or upgrade the schema to the current version (see db/migrations.py)."""
+    from db.migrations import migrate
+    migrate(get_connection())
 
 # Citizen helpers
 def add_citizen(full_name, national_id, gender, dob):
@@ -54,8 +75,10 @@ def add_citizen(full_name, national_id, gender, dob):
     cursor.execute("INSERT OR IGNORE INTO citizens (full_name, national_id, gender, date_of_birth) VALUES (?, ?, ?, ?)",
                    (full_name, national_id, gender, dob))
     conn.commit()
+    if cursor.rowcount == 0:
+        # Already registered; lastrowid would be the connection's last insert into any table
+        return cursor.execute("SELECT citizen_id FROM citizens WHERE national_id=?", (national_id,)).fetchone()[0]
     citizen_id = cursor.lastrowid
-    conn.close()
     return citizen_id
 
 def get_citizen_by_id(national_id):
@@ -63,7 +86,6 @@ def get_citizen_by_id(national_id):
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM citizens WHERE national_id=?", (national_id,))
     result = cursor.fetchone()
-    conn.close()
     return result
 
 # Informant helpers
@@ -73,8 +95,9 @@ def add_informant(full_name, id_number, relation):
     cursor.execute("INSERT OR IGNORE INTO informants (full_name, id_number, relation_to_deceased) VALUES (?, ?, ?)",
                    (full_name, id_number, relation))
     conn.commit()
+    if cursor.rowcount == 0:
+        return cursor.execute("SELECT informant_id FROM informants WHERE id_number=?", (id_number,)).fetchone()[0]
     informant_id = cursor.lastrowid
-    conn.close()
     return informant_id
 
 # Death record helpers
@@ -87,12 +110,74 @@ def add_death_record(citizen_id, date_of_death, place, cause, informant_id, cert
         (citizen_id, date_of_death, place, cause, informant_id, certificate_number))
     conn.commit()
     record_id = cursor.lastrowid
-    conn.close()
     return record_id
 def check_duplicate_death(citizen_id):
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_connection()
     c = conn.cursor()
     c.execute('SELECT record_id FROM death_records WHERE citizen_id = ?', (citizen_id,))
     result = c.fetchone()
-    conn.close()
-    return result is not None
\ No newline at end of file
+    return result is not None
+
+# --------------------------
+# Unit of work
+# --------------------------
+def register_death(citizen, informant, death_record, documents=(), fraud_checks=()):
+    """
+    Write a complete death registration in a single transaction.
+
+    `citizen` holds full_name, national_id, gender and dob; `informant`
+    holds full_name, id_number and relation; `death_record` holds
+    date_of_death, place_of_death and cause_of_death (plus an optional
+    certificate_number). `documents` are dicts with file_name, file_path
+    and verified; `fraud_checks` are dicts with check_type and result.
+
+    Idempotent on the deceased's national_id: if a death record already
+    exists for that citizen nothing is written and the existing ids are
+    returned with created=False.
+    """
+    with transaction() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute("INSERT OR IGNORE INTO citizens (full_name, national_id, gender, date_of_birth) VALUES (?, ?, ?, ?)",
+                       (citizen['full_name'], citizen['national_id'], citizen.get('gender'), citizen.get('dob')))
+        citizen_id = cursor.execute("SELECT citizen_id FROM citizens WHERE national_id=?",
+                                    (citizen['national_id'],)).fetchone()[0]
+
+        existing = cursor.execute("SELECT record_id, informant_id FROM death_records WHERE citizen_id=?",
+                                  (citizen_id,)).fetchone()
+        if existing:
+            return {"citizen_id": citizen_id, "informant_id": existing[1], "record_id": existing[0], "created": False}
+
+        # A blank informant ID is stored as NULL and never matched to an earlier informant
+        id_number = str(informant.get('id_number') or "").strip() or None
+        row = None
+        if id_number is not None:
+            row = cursor.execute("SELECT informant_id FROM informants WHERE id_number=?", (id_number,)).fetchone()
+        if row:
+            informant_id = row[0]
+        else:
+            cursor.execute("INSERT INTO informants (full_name, id_number, relation_to_deceased) VALUES (?, ?, ?)",
+                           (informant['full_name'], id_number, informant.get('relation')))
+            informant_id = cursor.lastrowid
+
+        cursor.execute("""
+            INSERT INTO death_records (citizen_id, date_of_death, place_of_death, cause_of_death, informant_id, certificate_number)
+            VALUES (?, ?, ?, ?, ?, ?)""",
+            (citizen_id, death_record['date_of_death'], death_record.get('place_of_death'),
+             death_record.get('cause_of_death'), informant_id, death_record.get('certificate_number')))
+        record_id = cursor.lastrowid
+
+        cursor.executemany(
+            "INSERT INTO documents (record_id, doc_type, file_path, verified) VALUES (?, ?, ?, ?)",
+            [(record_id, doc.get('doc_type', doc.get('file_name')), doc['file_path'], int(bool(doc.get('verified'))))
+             for doc in documents]
+        )
+        checked_at = datetime.now().isoformat(timespec="seconds")
+        cursor.executemany(
+            "INSERT INTO fraud_checks (record_id, check_type, result, checked_at) VALUES (?, ?, ?, ?)",
+            [(record_id, check['check_type'], str(check['result']), checked_at) for check in fraud_checks]
+        )
+
+    from db.duplicate_index import record_death
+    record_death(citizen_id, citizen['national_id'])
+    return {"citizen_id": citizen_id, "informant_id": informant_id, "record_id": record_id, "created": True}
@@ -0,0 +1,120 @@
+import threading
+from array import array
+from bisect import bisect_left
+from hashlib import blake2b
+from db.database import get_connection
+
+# --------------------------
+# In-memory duplicate-death index
+# --------------------------
+# Two compact sorted arrays (8 bytes per entry): the citizen_ids that already
+# have a death record, and 64-bit hashes of their national_ids. Lookups are a
+# binary search. Citizen ids are exact; a national_id hash hit is confirmed
+# against SQLite to rule out collisions.
+#
+# Before each lookup the index catches up on rows written by other threads,
+# processes or bulk imports by loading records with a record_id above the
+# highest one it has seen (death records are never deleted).
+
+def _national_id_key(national_id) -> int:
+    digest = blake2b(str(national_id).strip().encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+def _contains(values: array, value: int) -> bool:
+    i = bisect_left(values, value)
+    return i < len(values) and values[i] == value
+
+def _insert(values: array, value: int):
+    i = bisect_left(values, value)
+    if i == len(values) or values[i] != value:
+        values.insert(i, value)
+
+
+class DuplicateIndex:
+    def __init__(self):
+        self._citizen_ids = array("q")
+        self._national_ids = array("q")
+        self._last_record_id = 0
+        self._lock = threading.Lock()
+
+    def warm(self):
+        """(Re)load the whole index from the database."""
+        with self._lock:
+            self._citizen_ids = array("q")
+            self._national_ids = array("q")
+            self._last_record_id = 0
+            self._load_new_rows()
+
+    def _load_new_rows(self):
+        rows = get_connection().execute("""
+            SELECT d.record_id, d.citizen_id, c.national_id
+            FROM death_records d LEFT JOIN citizens c ON c.citizen_id = d.citizen_id
+            WHERE d.record_id > ?
+        """, (self._last_record_id,)).fetchall()
+        if not rows:
+            return
+        if len(rows) > 1000:
+            citizen_ids = set(self._citizen_ids)
+            national_ids = set(self._national_ids)
+            citizen_ids.update(row[1] for row in rows if row[1] is not None)
+            national_ids.update(_national_id_key(row[2]) for row in rows if row[2] is not None)
+            self._citizen_ids = array("q", sorted(citizen_ids))
+            self._national_ids = array("q", sorted(national_ids))
+        else:
+            for _, citizen_id, national_id in rows:
+                if citizen_id is not None:
+                    _insert(self._citizen_ids, citizen_id)
+                if national_id is not None:
+                    _insert(self._national_ids, _national_id_key(national_id))
+        self._last_record_id = max(self._last_record_id, max(row[0] for row in rows))
+
+    def refresh(self):
+        """Pick up death records written since the last refresh."""
+        latest = get_connection().execute("SELECT MAX(record_id) FROM death_records").fetchone()[0] or 0
+        with self._lock:
+            if latest > self._last_record_id:
+                self._load_new_rows()
+
+    def add(self, citizen_id=None, national_id=None):
+        """Record a newly inserted death record."""
+        with self._lock:
+            if citizen_id is not None:
+                _insert(self._citizen_ids, citizen_id)
+            if national_id is not None:
+                _insert(self._national_ids, _national_id_key(national_id))
+
+    def is_duplicate(self, citizen_id=None, national_id=None) -> bool:
+        """True if a death record already exists for this citizen / national_id."""
+        self.refresh()
+        with self._lock:
+            if citizen_id is not None and _contains(self._citizen_ids, citizen_id):
+                return True
+            if national_id is None or not _contains(self._national_ids, _national_id_key(national_id)):
+                return False
+        # Hash hit: confirm with the indexed lookup to rule out a collision
+        row = get_connection().execute("""
+            SELECT 1 FROM death_records d JOIN citizens c ON c.citizen_id = d.citizen_id
+            WHERE c.national_id = ? LIMIT 1
+        """, (national_id,)).fetchone()
+        return row is not None
+
+    def __len__(self):
+        return len(self._citizen_ids)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_duplicate_index() -> DuplicateIndex:
+    """Process-wide index, warmed from the database on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = DuplicateIndex()
+            _index.warm()
+        return _index
+
+def record_death(citizen_id, national_id):
+    """Update the index after an insert, if it has been loaded in this process."""
+    if _index is not None:
+        _index.add(citizen_id=citizen_id, national_id=national_id)
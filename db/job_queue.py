@@ -0,0 +1,154 @@
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from db import database
+from db.database import get_connection, transaction
+from db.migrations import migrate
+
+# --------------------------
+# Durable background job queue
+# --------------------------
+# Jobs live in the `jobs` table (schema version 5), so they survive restarts
+# and can be claimed by any number of worker processes. A job moves through
+# queued -> running -> done / failed. Claiming uses BEGIN IMMEDIATE, so two
+# workers never pick up the same job. A claim leases the job for
+# JOB_LEASE_SECONDS; the worker renews the lease with heartbeat() while the
+# job runs, so only a job whose worker died (or hung) is requeued once its
+# lease expires, up to JOB_MAX_ATTEMPTS times.
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "900"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+_schema_ready = set()
+_schema_lock = threading.Lock()
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+def _conn():
+    """This thread's connection, migrated once per process and database."""
+    conn = get_connection()
+    key = (os.getpid(), database.DB_PATH)
+    if key not in _schema_ready:
+        with _schema_lock:
+            if key not in _schema_ready:
+                migrate(conn)
+                _schema_ready.add(key)
+    return conn
+
+def _row_to_job(row) -> dict:
+    job_id, kind, payload, status, result, error, attempts, worker, created_at, started_at, finished_at = row
+    return {
+        "job_id": job_id,
+        "kind": kind,
+        "payload": json.loads(payload),
+        "status": status,
+        "result": json.loads(result) if result else None,
+        "error": error,
+        "attempts": attempts,
+        "worker": worker,
+        "created_at": created_at,
+        "started_at": started_at,
+        "finished_at": finished_at,
+    }
+
+_COLUMNS = "job_id, kind, payload, status, result, error, attempts, worker, created_at, started_at, finished_at"
+
+
+def enqueue(kind: str, payload: dict) -> int:
+    """Add a job and return its id. `payload` must be JSON-serializable."""
+    conn = _conn()
+    with transaction():
+        cursor = conn.execute(
+            "INSERT INTO jobs (kind, payload, status, created_at) VALUES (?, ?, ?, ?)",
+            (kind, json.dumps(payload, default=str), QUEUED, _now())
+        )
+    return cursor.lastrowid
+
+def get_job(job_id: int):
+    """Return the job as a dict, or None if it does not exist."""
+    row = _conn().execute(f"SELECT {_COLUMNS} FROM jobs WHERE job_id=?", (job_id,)).fetchone()
+    return _row_to_job(row) if row else None
+
+def claim(worker: str, kinds=None):
+    """
+    Atomically take the oldest queued job (optionally restricted to `kinds`)
+    and mark it running. Returns the job dict, or None if the queue is empty.
+    """
+    conn = _conn()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _requeue_expired(conn)
+        query = f"SELECT {_COLUMNS} FROM jobs WHERE status=?"
+        params = [QUEUED]
+        if kinds:
+            query += f" AND kind IN ({', '.join('?' for _ in kinds)})"
+            params.extend(kinds)
+        row = conn.execute(query + " ORDER BY job_id LIMIT 1", params).fetchone()
+        if row is None:
+            conn.commit()
+            return None
+        started_at = _now()
+        conn.execute(
+            "UPDATE jobs SET status=?, worker=?, started_at=?, lease_until=?, attempts=attempts+1 WHERE job_id=?",
+            (RUNNING, worker, started_at, _lease_until(), row[0])
+        )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    job = _row_to_job(row)
+    job.update(status=RUNNING, worker=worker, started_at=started_at, attempts=job["attempts"] + 1)
+    return job
+
+def _lease_until() -> str:
+    return (datetime.now() + timedelta(seconds=JOB_LEASE_SECONDS)).isoformat(timespec="seconds")
+
+def heartbeat(job_id: int, worker: str) -> bool:
+    """
+    Extend the lease of a running job held by `worker`. Returns False if the
+    job is no longer this worker's (e.g. its lease already expired).
+    """
+    with transaction() as conn:
+        cursor = conn.execute(
+            "UPDATE jobs SET lease_until=? WHERE job_id=? AND status=? AND worker=?",
+            (_lease_until(), job_id, RUNNING, worker)
+        )
+    return cursor.rowcount == 1
+
+def _requeue_expired(conn):
+    """Return jobs whose worker stopped renewing its lease to the queue (or fail them)."""
+    now = _now()
+    # Jobs claimed before leases existed have no lease_until; fall back to started_at
+    cutoff = (datetime.now() - timedelta(seconds=JOB_LEASE_SECONDS)).isoformat(timespec="seconds")
+    expired = "status=? AND (lease_until < ? OR (lease_until IS NULL AND started_at < ?))"
+    conn.execute(
+        f"UPDATE jobs SET status=?, error=?, finished_at=? WHERE {expired} AND attempts >= ?",
+        (FAILED, "worker lease expired", now, RUNNING, now, cutoff, JOB_MAX_ATTEMPTS)
+    )
+    conn.execute(
+        f"UPDATE jobs SET status=?, worker=NULL, lease_until=NULL WHERE {expired}",
+        (QUEUED, RUNNING, now, cutoff)
+    )
+
+def complete(job_id: int, result: dict):
+    with transaction() as conn:
+        conn.execute(
+            "UPDATE jobs SET status=?, result=?, error=NULL, finished_at=? WHERE job_id=?",
+            (DONE, json.dumps(result, default=str), _now(), job_id)
+        )
+
+def fail(job_id: int, error: str):
+    with transaction() as conn:
+        conn.execute(
+            "UPDATE jobs SET status=?, error=?, finished_at=? WHERE job_id=?",
+            (FAILED, error, _now(), job_id)
+        )
+
+def counts() -> dict:
+    """Number of jobs in each status, for monitoring queue depth."""
+    rows = _conn().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+    return {status: 0 for status in (QUEUED, RUNNING, DONE, FAILED)} | dict(rows)
@@ -0,0 +1,288 @@
+# --------------------------
+# Versioned schema migrations
+# --------------------------
+# The schema version is kept in SQLite's PRAGMA user_version. Each migration
+# runs in its own transaction and bumps the version, so migrate() is safe to
+# call on every startup and on databases created by any earlier version of
+# init_db (which used dob / place / relation column names).
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+def _initial_schema(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS citizens (
+        citizen_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        full_name TEXT,
+        national_id TEXT UNIQUE,
+        gender TEXT,
+        date_of_birth TEXT,
+        status TEXT DEFAULT 'alive'
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS informants (
+        informant_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        full_name TEXT,
+        id_number TEXT UNIQUE,
+        relation_to_deceased TEXT
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS death_records (
+        record_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        citizen_id INTEGER,
+        date_of_death TEXT,
+        place_of_death TEXT,
+        cause_of_death TEXT,
+        informant_id INTEGER,
+        certificate_number TEXT UNIQUE,
+        status TEXT DEFAULT 'pending',
+        FOREIGN KEY (citizen_id) REFERENCES citizens(citizen_id),
+        FOREIGN KEY (informant_id) REFERENCES informants(informant_id)
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS documents (
+        doc_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        record_id INTEGER,
+        doc_type TEXT,
+        file_path TEXT,
+        verified INTEGER DEFAULT 0,
+        FOREIGN KEY (record_id) REFERENCES death_records(record_id)
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS fraud_checks (
+        check_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        record_id INTEGER,
+        check_type TEXT,
+        result TEXT,
+        checked_at TEXT,
+        FOREIGN KEY (record_id) REFERENCES death_records(record_id)
+    )
+    """)
+
+def _canonical_columns(conn):
+    """Rename the legacy db/database.py columns and add columns it lacked."""
+    renames = [
+        ("citizens", "dob", "date_of_birth"),
+        ("death_records", "place", "place_of_death"),
+        ("informants", "relation", "relation_to_deceased"),
+    ]
+    for table, old, new in renames:
+        columns = _columns(conn, table)
+        if old in columns and new not in columns:
+            conn.execute(f"ALTER TABLE {table} RENAME COLUMN {old} TO {new}")
+
+    additions = [
+        ("citizens", "status", "TEXT DEFAULT 'alive'"),
+        ("death_records", "status", "TEXT DEFAULT 'pending'"),
+    ]
+    for table, column, definition in additions:
+        if column not in _columns(conn, table):
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+# --------------------------
+# Duplicate resolution
+# --------------------------
+# Older versions of the app wrote two death records per approved
+# registration (one from the form, one from the workflow) and never
+# enforced UNIQUE on informant IDs or certificate numbers, so these run
+# before the corresponding unique indexes are created.
+
+def dedupe_death_records(conn) -> int:
+    """
+    Keep one death record per citizen: the lowest record_id, with any empty
+    fields filled from its newest duplicate that has them. Documents and
+    fraud checks of the duplicates move to the kept record. Returns the
+    number of records removed.
+    """
+    conn.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS death_record_keepers AS
+        SELECT citizen_id, MIN(record_id) AS keep_id FROM death_records
+        WHERE citizen_id IS NOT NULL
+        GROUP BY citizen_id HAVING COUNT(*) > 1
+    """)
+    try:
+        if not conn.execute("SELECT COUNT(*) FROM death_record_keepers").fetchone()[0]:
+            return 0
+        for column in ("date_of_death", "place_of_death", "cause_of_death", "informant_id", "certificate_number"):
+            conn.execute(f"""
+                UPDATE death_records SET {column} = (
+                    SELECT d.{column} FROM death_records d
+                    WHERE d.citizen_id = death_records.citizen_id AND d.record_id != death_records.record_id
+                      AND d.{column} IS NOT NULL AND d.{column} != ''
+                    ORDER BY d.record_id DESC LIMIT 1
+                )
+                WHERE record_id IN (SELECT keep_id FROM death_record_keepers)
+                  AND ({column} IS NULL OR {column} = '')
+                  AND EXISTS (
+                    SELECT 1 FROM death_records d
+                    WHERE d.citizen_id = death_records.citizen_id AND d.record_id != death_records.record_id
+                      AND d.{column} IS NOT NULL AND d.{column} != ''
+                  )
+            """)
+        duplicates = """
+            SELECT d.record_id, k.keep_id FROM death_records d
+            JOIN death_record_keepers k ON k.citizen_id = d.citizen_id
+            WHERE d.record_id != k.keep_id
+        """
+        for table in ("documents", "fraud_checks"):
+            conn.execute(f"""
+                UPDATE {table} SET record_id = (
+                    SELECT keep_id FROM ({duplicates}) WHERE record_id = {table}.record_id
+                )
+                WHERE record_id IN (SELECT record_id FROM ({duplicates}))
+            """)
+        removed = conn.execute(f"DELETE FROM death_records WHERE record_id IN (SELECT record_id FROM ({duplicates}))").rowcount
+        logger.warning(f"Merged {removed} duplicate death record(s) into the oldest record of each citizen")
+        return removed
+    finally:
+        conn.execute("DROP TABLE death_record_keepers")
+
+def dedupe_informants(conn) -> int:
+    """Keep the lowest informant_id per id_number and point death records at it."""
+    conn.execute("UPDATE informants SET id_number = NULL WHERE TRIM(id_number) = ''")
+    duplicates = """
+        SELECT i.informant_id, k.keep_id FROM informants i
+        JOIN (SELECT id_number, MIN(informant_id) AS keep_id FROM informants
+              WHERE id_number IS NOT NULL GROUP BY id_number HAVING COUNT(*) > 1) k
+          ON k.id_number = i.id_number
+        WHERE i.informant_id != k.keep_id
+    """
+    conn.execute(f"""
+        UPDATE death_records SET informant_id = (
+            SELECT keep_id FROM ({duplicates}) WHERE informant_id = death_records.informant_id
+        )
+        WHERE informant_id IN (SELECT informant_id FROM ({duplicates}))
+    """)
+    removed = conn.execute(f"DELETE FROM informants WHERE informant_id IN (SELECT informant_id FROM ({duplicates}))").rowcount
+    if removed:
+        logger.warning(f"Merged {removed} duplicate informant(s) sharing an id_number")
+    return removed
+
+def dedupe_certificate_numbers(conn) -> int:
+    """
+    Clear a certificate number on every record but the oldest that carries
+    it; those certificates can be reissued (python -m agents.death.certificates).
+    """
+    conn.execute("UPDATE death_records SET certificate_number = NULL WHERE TRIM(certificate_number) = ''")
+    cleared = conn.execute("""
+        UPDATE death_records SET certificate_number = NULL
+        WHERE certificate_number IS NOT NULL AND record_id NOT IN (
+            SELECT MIN(record_id) FROM death_records
+            WHERE certificate_number IS NOT NULL GROUP BY certificate_number
+        )
+    """).rowcount
+    if cleared:
+        logger.warning(f"Cleared {cleared} duplicate certificate number(s); reissue those certificates")
+    return cleared
+
+def _has_unique_index(conn, table, column) -> bool:
+    for _, name, unique, *_ in conn.execute(f"PRAGMA index_list({table})"):
+        if unique and [row[2] for row in conn.execute(f"PRAGMA index_info('{name}')")] == [column]:
+            return True
+    return False
+
+def _indexes(conn):
+    dedupe_death_records(conn)
+    # The unique index doubles as the lookup index for check_duplicate_death
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_death_records_citizen_id ON death_records(citizen_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_informants_id_number ON informants(id_number)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_record_id ON documents(record_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_fraud_checks_record_id ON fraud_checks(record_id)")
+
+def _import_checkpoints(conn):
+    # Rows of each source file already committed by db/bulk_import.py
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS import_checkpoints (
+        source TEXT PRIMARY KEY,
+        rows_done INTEGER NOT NULL,
+        updated_at TEXT
+    )
+    """)
+
+def _jobs(conn):
+    # Background job queue used by db/job_queue.py
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS jobs (
+        job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'queued',
+        result TEXT,
+        error TEXT,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        worker TEXT,
+        created_at TEXT,
+        started_at TEXT,
+        finished_at TEXT
+    )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, job_id)")
+
+def _unique_identifiers(conn):
+    # Databases created by the legacy init_db lack the UNIQUE constraints
+    # of migration 1; add them as indexes so every database enforces them.
+    dedupe_informants(conn)
+    dedupe_certificate_numbers(conn)
+    if not _has_unique_index(conn, "informants", "id_number"):
+        conn.execute("CREATE UNIQUE INDEX ux_informants_id_number ON informants(id_number)")
+    if not _has_unique_index(conn, "death_records", "certificate_number"):
+        conn.execute("CREATE UNIQUE INDEX ux_death_records_certificate_number ON death_records(certificate_number)")
+    # Superseded by the unique index
+    conn.execute("DROP INDEX IF EXISTS idx_informants_id_number")
+
+def _job_leases(conn):
+    # Renewed by the running worker (db/job_queue.heartbeat)
+    if "lease_until" not in _columns(conn, "jobs"):
+        conn.execute("ALTER TABLE jobs ADD COLUMN lease_until TEXT")
+
+MIGRATIONS = [
+    (1, "initial schema", _initial_schema),
+    (2, "canonical column names", _canonical_columns),
+    (3, "lookup indexes and one death record per citizen", _indexes),
+    (4, "bulk import checkpoints", _import_checkpoints),
+    (5, "background job queue", _jobs),
+    (6, "unique informant IDs and certificate numbers", _unique_identifiers),
+    (7, "renewable job leases", _job_leases),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def get_version(conn) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn) -> list:
+    """Apply every pending migration to `conn`; returns the versions applied."""
+    applied = []
+    for version, description, apply in MIGRATIONS:
+        if version <= get_version(conn):
+            continue
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            apply(conn)
+            conn.execute(f"PRAGMA user_version={version}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        applied.append(version)
+    return applied
+
+
+if __name__ == "__main__":
+    from db.database import get_connection, DB_PATH
+
+    conn = get_connection()
+    before = get_version(conn)
+    applied = migrate(conn)
+    if applied:
+        print(f"Migrated {DB_PATH} from version {before} to {get_version(conn)}")
+    else:
+        print(f"{DB_PATH} is already at schema version {before}")
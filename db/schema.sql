@@ -1,26 +1,75 @@
+-- Canonical civil registry schema (schema version 7).
+-- Reference only: the database is created and upgraded by db/migrations.py.
+
 CREATE TABLE IF NOT EXISTS citizens (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    full_name TEXT NOT NULL,
-    national_id TEXT UNIQUE NOT NULL,
+    citizen_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    full_name TEXT,
+    national_id TEXT UNIQUE,
     gender TEXT,
-    dob TEXT
+    date_of_birth TEXT,
+    status TEXT DEFAULT 'alive'
 );
 
 CREATE TABLE IF NOT EXISTS informants (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    name TEXT NOT NULL,
-    id_number TEXT NOT NULL,
-    relation TEXT
+    informant_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    full_name TEXT,
+    id_number TEXT UNIQUE,
+    relation_to_deceased TEXT
 );
 
 CREATE TABLE IF NOT EXISTS death_records (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    citizen_id INTEGER NOT NULL,
+    record_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    citizen_id INTEGER,
     date_of_death TEXT,
-    place TEXT,
-    cause TEXT,
+    place_of_death TEXT,
+    cause_of_death TEXT,
     informant_id INTEGER,
-    certificate_number TEXT,
-    FOREIGN KEY(citizen_id) REFERENCES citizens(id),
-    FOREIGN KEY(informant_id) REFERENCES informants(id)
+    certificate_number TEXT UNIQUE,
+    status TEXT DEFAULT 'pending',
+    FOREIGN KEY (citizen_id) REFERENCES citizens(citizen_id),
+    FOREIGN KEY (informant_id) REFERENCES informants(informant_id)
+);
+
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    record_id INTEGER,
+    doc_type TEXT,
+    file_path TEXT,
+    verified INTEGER DEFAULT 0,
+    FOREIGN KEY (record_id) REFERENCES death_records(record_id)
+);
+
+CREATE TABLE IF NOT EXISTS fraud_checks (
+    check_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    record_id INTEGER,
+    check_type TEXT,
+    result TEXT,
+    checked_at TEXT,
+    FOREIGN KEY (record_id) REFERENCES death_records(record_id)
 );
+
+CREATE TABLE IF NOT EXISTS import_checkpoints (
+    source TEXT PRIMARY KEY,
+    rows_done INTEGER NOT NULL,
+    updated_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    created_at TEXT,
+    started_at TEXT,
+    finished_at TEXT,
+    lease_until TEXT
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_death_records_citizen_id ON death_records(citizen_id);
+CREATE INDEX IF NOT EXISTS idx_documents_record_id ON documents(record_id);
+CREATE INDEX IF NOT EXISTS idx_fraud_checks_record_id ON fraud_checks(record_id);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, job_id);
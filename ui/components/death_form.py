@@ -1,9 +1,7 @@
 import streamlit as st
-import os
-from db.database import add_citizen, add_informant, add_death_record
-from agents.death.workflow import run_death_registration
-from agents.death.config import DOCUMENTS_PATH
-from pathlib import Path
+from agents.death.worker import submit_death_registration
+from agents.death.uploads import get_upload_store, UploadTooLarge
+from ui.components.job_status import job_status_view
 
 def death_registration_form():
     st.header("Death Registration Form")
@@ -29,48 +27,30 @@ def death_registration_form():
         submitted = st.form_submit_button("Submit")
 
         if submitted:
-            citizen_id = add_citizen(full_name, national_id, gender, dob)
-            informant_id_db = add_informant(informant_name, informant_id, relation)
-            record_id = add_death_record(citizen_id, date_of_death, place_of_death, cause_of_death, informant_id_db, certificate_number=None)
-
-            # Save uploaded files locally
-            os.makedirs(DOCUMENTS_PATH, exist_ok=True)
-            for file in uploaded_files:
-                file_path = os.path.join(DOCUMENTS_PATH, file.name)
-                with open(file_path, "wb") as f:
-                    f.write(file.getbuffer())
-
-            # Run agent workflow
+            # Stream uploads into the content-addressed store; workers read them from there
+            try:
+                stored_files = get_upload_store().save_all(uploaded_files)
+            except UploadTooLarge as e:
+                st.error(str(e))
+                return
+
+            # Queue the agent workflow (it writes all registration rows in one transaction)
             data = {
-                "record_id": record_id,
                 "full_name": full_name,
                 "national_id": national_id,
+                "gender": gender,
+                "dob": dob,
                 "date_of_death": date_of_death,
                 "place_of_death": place_of_death,
                 "cause_of_death": cause_of_death,
                 "informant_name": informant_name,
                 "informant_id": informant_id,
                 "relation": relation,
-                "citizen_id": citizen_id
+                "uploaded_files": stored_files
             }
 
-            result = run_death_registration(data)
-            cert_path = result.get('certificate_path', None)
-
-            if cert_path and Path(cert_path).exists():
-                st.success(f"Certificate generated: {cert_path}")
-                
-                # Open the file in binary mode
-                with open(cert_path, "rb") as f:
-                    pdf_bytes = f.read()
-                
-                # Download button
-                st.download_button(
-                    label="Download Certificate",
-                    data=pdf_bytes,
-                    file_name=Path(cert_path).name,
-                    mime="application/pdf"
-                )
-            else:
-                st.warning("Certificate path not found. Please check the workflow.")
+            st.session_state["death_job_id"] = submit_death_registration(data)
 
+    # Poll the most recent application's status across reruns
+    if "death_job_id" in st.session_state:
+        job_status_view(st.session_state["death_job_id"])
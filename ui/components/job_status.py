@@ -0,0 +1,46 @@
+import streamlit as st
+from pathlib import Path
+from agents.death.worker import get_registration_status
+
+STATUS_MESSAGES = {
+    "queued": "Waiting for a worker to pick up the application...",
+    "running": "Verifying documents and running fraud checks...",
+}
+
+def job_status_view(job_id: int):
+    """Show the progress of a queued registration and, once done, its certificate."""
+    job = get_registration_status(job_id)
+    if job is None:
+        st.error(f"Application #{job_id} not found.")
+        return
+
+    st.subheader(f"Application #{job_id}")
+    if job["status"] in STATUS_MESSAGES:
+        st.info(STATUS_MESSAGES[job["status"]])
+        st.button("Refresh status", key=f"refresh_{job_id}")
+        return
+    if job["status"] == "failed":
+        st.error(f"Processing failed: {job['error']}")
+        return
+
+    result = job["result"] or {}
+    cert_path = result.get('certificate_path')
+    if result.get('status') != 'approved':
+        st.warning(f"Registration not approved: {result.get('status')}")
+    elif cert_path and Path(cert_path).exists():
+        st.success(f"Certificate generated: {cert_path}")
+
+        # Open the file in binary mode
+        with open(cert_path, "rb") as f:
+            pdf_bytes = f.read()
+
+        # Download button
+        st.download_button(
+            label="Download Certificate",
+            data=pdf_bytes,
+            file_name=Path(cert_path).name,
+            mime="application/pdf",
+            key=f"download_{job_id}"
+        )
+    else:
+        st.warning("Certificate path not found. Please check the workflow.")